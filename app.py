@@ -2,11 +2,9 @@
 """Main application module."""
 import os
 from app import create_app
-from app.commands import register_commands
 from app.extensions import db
 
 app = create_app()
-register_commands(app)
 
 @app.shell_context_processor
 def make_shell_context():
@@ -1,12 +1,14 @@
 """Application factory module."""
 import os
+import time
+from importlib import import_module
 from pathlib import Path
 from flask import Flask
 from dotenv import load_dotenv
 from .extensions import init_extensions
 from .config import config
-from .blueprints.main import bp as main_bp
-from .blueprints.vendor import bp as vendor_bp
+from .utils import templating
+from .utils.startup import timed
 
 def load_env():
     """Load environment variables from .env file."""
@@ -14,8 +16,17 @@ def load_env():
     if env_path.exists():
         load_dotenv(env_path)
 
+def register_blueprints(app):
+    """Import and register the blueprints listed in ``BLUEPRINTS``."""
+    for name in app.config['BLUEPRINTS']:
+        with timed(app, name.lstrip('.')):
+            module = import_module(name, __name__)
+            app.register_blueprint(module.bp)
+
 def create_app(config_name=None):
     """Create Flask application."""
+    started = time.perf_counter()
+
     # Load environment variables
     load_env()
     
@@ -34,16 +45,33 @@ def create_app(config_name=None):
     
     # Load additional config from environment variables
     app.config.from_prefixed_env(prefix="FLASK")
+
+    # Template caches; must be set up before the Jinja environment is used
+    with timed(app, 'templates'):
+        templating.init_app(app)
     
     # Initialize extensions
     init_extensions(app)
     
     # Register blueprints
-    app.register_blueprint(main_bp)
-    app.register_blueprint(vendor_bp)
+    register_blueprints(app)
+
+    # Register CLI commands; only the `flask` CLI needs them, so WSGI
+    # workers skip importing them
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        with timed(app, 'commands'):
+            from .commands import register_commands
+            register_commands(app)
+
+    # Start background jobs if enabled
+    with timed(app, 'scheduler'):
+        from .jobs import init_scheduler
+        init_scheduler(app)
+
     # Configure logging
     if not app.debug and not app.testing:
         # Add production logging configuration here if needed
         pass
-    
+
+    app.extensions['startup']['create_app'] = time.perf_counter() - started
     return app
\ No newline at end of file
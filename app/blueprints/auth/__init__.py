@@ -0,0 +1,69 @@
+"""Authentication blueprint."""
+from datetime import datetime
+from urllib.parse import urlsplit
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask_login import login_user, logout_user, current_user
+from sqlalchemy import or_
+from ...extensions import db
+from ...models import User
+from ...utils.passwords import password_hasher, login_throttle, HasherBusy
+
+bp = Blueprint('auth', __name__, url_prefix='/auth')
+
+def _safe_next(target):
+    """Only follow relative redirect targets."""
+    if target and not urlsplit(target).netloc and target.startswith('/'):
+        return target
+    return url_for('main.index')
+
+def _login_form(status=200, headers=None):
+    return render_template('auth/login.html'), status, headers or {}
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    """Sign in with a username or email and password."""
+    if current_user.is_authenticated:
+        return redirect(_safe_next(request.args.get('next')))
+    if request.method == 'GET':
+        return _login_form()
+
+    username = request.form.get('username', '').strip()
+    password = request.form.get('password', '')
+    ip = request.remote_addr or ''
+    retry_after = login_throttle.retry_after(username, ip)
+    if retry_after:
+        flash('Too many failed sign-in attempts. Please try again later.', 'danger')
+        return _login_form(429, {'Retry-After': str(retry_after)})
+
+    user = (User.query.filter(or_(User.username == username, User.email == username)).first()
+            if username else None)
+    # Unknown and inactive accounts are checked against a dummy hash so the
+    # response time does not reveal which usernames exist.
+    password_hash = user.password_hash if user is not None and user.is_active else None
+    try:
+        valid = password_hasher.verify(password_hash, password) and password_hash is not None
+    except HasherBusy:
+        flash('The server is busy. Please try again in a moment.', 'warning')
+        return _login_form(503, {'Retry-After': '1'})
+    if not valid:
+        login_throttle.record_failure(username, ip)
+        flash('Invalid username or password.', 'danger')
+        return _login_form(401)
+
+    login_throttle.reset(username)
+    if password_hasher.needs_rehash(user.password_hash):
+        try:
+            user.password_hash = password_hasher.hash(password)
+        except HasherBusy:
+            pass  # Upgrade on a later login instead of failing this one.
+    user.last_login = datetime.utcnow()
+    db.session.commit()
+    login_user(user, remember=bool(request.form.get('remember')))
+    return redirect(_safe_next(request.args.get('next')))
+
+@bp.route('/logout', methods=['POST'])
+def logout():
+    """Sign out."""
+    logout_user()
+    flash('You have been signed out.', 'info')
+    return redirect(url_for('auth.login'))
@@ -1,5 +1,12 @@
 """Main blueprint module."""
-from flask import Blueprint, render_template
+from datetime import date, timedelta
+from flask import Blueprint, render_template, current_app
+from flask_login import login_required
+from sqlalchemy.orm import joinedload
+from ...models import DashboardCounter, Permission, Vendor, VendorCategory, VendorDocument
+from ...utils.decorators import permission_required
+from ...utils.query_plan import allow_scan
+from ...utils.reference import reference_cache
 
 bp = Blueprint("main", __name__,
                template_folder='templates')
@@ -10,6 +17,33 @@ def index():
     return render_template("index.html")
 
 @bp.route("/dashboard")
+@login_required
+@permission_required(Permission.VIEW)
 def dashboard():
-    """Dashboard page."""
-    return render_template("index.html")  # Using index.html as dashboard for now
\ No newline at end of file
+    """Dashboard page, rendered from the precomputed dashboard counters."""
+    today = date.today()
+    horizon = today + timedelta(days=current_app.config['DOCUMENT_EXPIRY_DAYS'])
+    categories = {str(category.id): category.name
+                  for category in reference_cache.all(VendorCategory)}
+    by_category = sorted(
+        ((categories.get(bucket, 'Uncategorized'), count)
+         for bucket, count in DashboardCounter.values('vendors.category').items()),
+        key=lambda item: -item[1])
+    by_status = sorted(DashboardCounter.values('vendors.status').items(),
+                       key=lambda item: -item[1])
+    expiring_count = DashboardCounter.total('documents.expiry',
+                                            today.isoformat(), horizon.isoformat())
+    # Both lists are short: a range of the (expiry_date, id) index, and the
+    # last five rows of the primary key (a scan that stops after five rows).
+    expiring = (VendorDocument.query
+                .options(joinedload(VendorDocument.vendor))
+                .filter(VendorDocument.expiry_date.between(today, horizon))
+                .order_by(VendorDocument.expiry_date, VendorDocument.id)
+                .limit(5).all())
+    recent = allow_scan(Vendor.query.order_by(Vendor.id.desc()).limit(5),
+                        'newest vendors').all()
+    return render_template("dashboard.html",
+                           vendor_total=DashboardCounter.total('vendors'),
+                           by_status=by_status, by_category=by_category,
+                           expiring_count=expiring_count, expiring=expiring,
+                           horizon=horizon, recent=recent)
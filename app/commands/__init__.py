@@ -0,0 +1,55 @@
+"""CLI commands module."""
+import sys
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from ..extensions import db
+from .assets import assets_cli
+from .changes import changes_cli
+from .dashboard import dashboard_cli
+from .documents import documents_cli
+from .mail import mail_cli
+from .vendors import vendors_cli
+
+
+def register_commands(app):
+    """Register CLI commands with the app."""
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(vendors_cli)
+    app.cli.add_command(documents_cli)
+    app.cli.add_command(mail_cli)
+    app.cli.add_command(dashboard_cli)
+    app.cli.add_command(changes_cli)
+    app.cli.add_command(assets_cli)
+
+
+@click.command('check-query-plans')
+@click.option('--user', 'username', required=True,
+              help='User to make the requests as; needs view permission.')
+@click.option('--url', 'urls', multiple=True,
+              help='URL to check (repeatable). Defaults to every GET route.')
+@with_appcontext
+def check_query_plans_command(username, urls):
+    """Fail if a query issued by the views scans a whole table."""
+    from ..models import User, Vendor
+    from ..utils.query_plan import DEFAULT_PROBES, check_query_plans, default_urls
+
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.BadParameter(f'No user named {username!r}', param_hint='--user')
+    if not urls:
+        vendor = Vendor.query.order_by(Vendor.id).first()
+        sample_values = {'id': vendor.id} if vendor else {}
+        urls = default_urls(current_app, sample_values) + list(DEFAULT_PROBES)
+
+    violations = check_query_plans(
+        current_app._get_current_object(), urls, user_id=user.id,
+        allowed_tables=current_app.config['QUERY_PLAN_ALLOWED_SCANS'])
+    db.session.remove()
+    for violation in violations:
+        click.echo(f'{violation.url}: {violation.detail}')
+        click.echo(f'    {violation.statement}')
+    if violations:
+        click.echo(f'{len(violations)} full table scan(s) found.', err=True)
+        sys.exit(1)
+    click.echo(f'Checked {len(urls)} URL(s); no full table scans.')
@@ -0,0 +1,32 @@
+"""Static asset CLI commands."""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from ..utils import assets
+
+assets_cli = AppGroup('assets', help='Static asset commands.')
+
+
+@assets_cli.command('build')
+@click.option('--offline', is_flag=True,
+              help='Use the vendored files already downloaded.')
+@click.option('--refresh', is_flag=True,
+              help='Download vendored files again even if present.')
+@click.option('--clean', is_flag=True,
+              help='Remove earlier builds instead of keeping them for old pages.')
+def build_command(offline, refresh, clean):
+    """Vendor, minify, fingerprint and precompress the static files."""
+    static_folder = current_app.static_folder
+    if not offline:
+        fetched, kept, failed = assets.vendor_assets(
+            static_folder, current_app.config['VENDOR_ASSETS'], refresh=refresh)
+        for path, url in fetched:
+            click.echo(f'  downloaded {path}', err=True)
+        for path, error in failed:
+            click.echo(f'  could not download {path}: {error}', err=True)
+        click.echo(f'Vendored {len(fetched)} new and {len(kept)} existing file(s)'
+                   + (f', {len(failed)} missing' if failed else ''), err=True)
+    result = assets.build_assets(static_folder, clean=clean)
+    click.echo(f'Built {result}')
+    if '.br' not in assets.compressors():
+        click.echo('The brotli package is not installed; skipped .br variants.', err=True)
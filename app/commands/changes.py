@@ -0,0 +1,47 @@
+"""Change feed CLI commands."""
+import json
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from ..utils import change_feed
+
+changes_cli = AppGroup('changes', help='Change feed commands.')
+
+
+@changes_cli.command('feed')
+@click.argument('entity', type=click.Choice(change_feed.ENTITIES))
+@click.option('--cursor', help='Cursor returned by the previous sync.')
+@click.option('--limit', type=int, default=None,
+              help='Changes per page. Defaults to CHANGE_FEED_PAGE_SIZE.')
+@click.option('--all', 'read_all', is_flag=True,
+              help='Keep reading pages until caught up.')
+def feed_command(entity, cursor, limit, read_all):
+    """Print changes to ENTITY after --cursor as JSON Lines.
+
+    The cursor to resume from is printed to stderr.
+    """
+    config = current_app.config
+    while True:
+        try:
+            page = change_feed.read_changes(
+                entity, cursor, limit or config['CHANGE_FEED_PAGE_SIZE'],
+                lag_seconds=config['CHANGE_FEED_LAG_SECONDS'])
+        except change_feed.CursorError as e:
+            raise click.BadParameter(str(e), param_hint='--cursor')
+        for item in page.items:
+            click.echo(json.dumps(item, separators=(',', ':')))
+        cursor = page.next_cursor
+        if not (read_all and page.has_more):
+            break
+    click.echo(f'next cursor: {cursor or ""}', err=True)
+
+
+@changes_cli.command('prune')
+@click.option('--days', type=int, default=None,
+              help='Keep tombstones this many days. '
+                   'Defaults to CHANGE_FEED_RETENTION_DAYS.')
+def prune_command(days):
+    """Delete tombstones older than the retention period."""
+    days = current_app.config['CHANGE_FEED_RETENTION_DAYS'] if days is None else days
+    count = change_feed.prune_tombstones(days)
+    click.echo(f'Deleted {count} tombstone(s) older than {days} day(s).')
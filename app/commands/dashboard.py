@@ -0,0 +1,14 @@
+"""Dashboard CLI commands."""
+import click
+from flask.cli import AppGroup
+
+dashboard_cli = AppGroup('dashboard', help='Dashboard aggregate commands.')
+
+
+@dashboard_cli.command('rebuild')
+def rebuild_command():
+    """Recompute the dashboard counters from the vendor and document tables."""
+    from ..models import DashboardCounter
+
+    DashboardCounter.rebuild()
+    click.echo(f"Rebuilt dashboard counters; {DashboardCounter.total('vendors')} vendor(s).")
@@ -0,0 +1,21 @@
+"""Vendor document CLI commands."""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+documents_cli = AppGroup('documents', help='Vendor document commands.')
+
+
+@documents_cli.command('scan-expiring')
+@click.option('--days', type=int, default=None,
+              help='Notify about documents expiring within this many days. '
+                   'Defaults to DOCUMENT_EXPIRY_DAYS.')
+@click.option('--batch-size', default=500, show_default=True,
+              help='Documents processed per transaction.')
+def scan_expiring_command(days, batch_size):
+    """Send notifications for documents that are about to expire."""
+    from ..jobs.expiry import scan_expiring_documents
+
+    days = days if days is not None else current_app.config['DOCUMENT_EXPIRY_DAYS']
+    count = scan_expiring_documents(days, batch_size=batch_size)
+    click.echo(f'Notified about {count} expiring document(s).')
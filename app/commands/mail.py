@@ -0,0 +1,30 @@
+"""Mail outbox CLI commands."""
+import click
+from flask.cli import AppGroup
+
+mail_cli = AppGroup('mail', help='Mail outbox commands.')
+
+
+@mail_cli.command('drain')
+@click.option('--batch-size', type=int, default=None,
+              help='Messages claimed per batch. Defaults to MAIL_BATCH_SIZE.')
+def drain_command(batch_size):
+    """Send every due message in the outbox."""
+    from ..jobs.mail import drain_outbox
+
+    sent, failed = drain_outbox(batch_size)
+    click.echo(f'Sent {sent} message(s); {failed} failed.')
+
+
+@mail_cli.command('status')
+def status_command():
+    """Show outbox message counts by status."""
+    from sqlalchemy import func, select
+    from ..extensions import db
+    from ..models import OutboxMessage
+
+    rows = db.session.execute(
+        select(OutboxMessage.status, func.count())
+        .group_by(OutboxMessage.status)).all()
+    for status, count in sorted(rows):
+        click.echo(f'{status}: {count}')
@@ -0,0 +1,110 @@
+"""Vendor data CLI commands."""
+import time
+import click
+from flask.cli import AppGroup
+from ..utils import vendor_io
+
+vendors_cli = AppGroup('vendors', help='Vendor data commands.')
+
+
+@vendors_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'fmt', type=click.Choice(vendor_io.FORMATS),
+              help='Input format; guessed from the file name by default.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows written per transaction.')
+def import_command(source, fmt, batch_size):
+    """Import vendors from a CSV or JSON Lines file ('-' for stdin).
+
+    Vendors are matched on tax ID: existing ones are updated, the rest
+    inserted.
+    """
+    fmt = fmt or vendor_io.guess_format(source.name)
+    records = vendor_io.read_records(source, fmt)
+    stats = vendor_io.import_vendors(
+        records, batch_size=batch_size,
+        progress=lambda stats: click.echo(f'  {stats}', err=True))
+    click.echo(f'Imported {stats}')
+
+
+@vendors_cli.command('export')
+@click.argument('target', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--format', 'fmt', type=click.Choice(vendor_io.FORMATS),
+              help='Output format; guessed from the file name by default.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows fetched per round trip.')
+def export_command(target, fmt, batch_size):
+    """Export all vendors with their contacts ('-' for stdout)."""
+    fmt = fmt or vendor_io.guess_format(target.name)
+    started = time.perf_counter()
+    count = vendor_io.write_records(
+        vendor_io.iter_records(batch_size=batch_size), target, fmt)
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0.0
+    click.echo(f'Exported {count} vendors in {elapsed:.1f}s, {rate:.0f} rows/s',
+               err=True)
+
+
+@vendors_cli.command('duplicates')
+@click.option('--threshold', type=float, default=None,
+              help='Minimum score to report. Defaults to DEDUP_THRESHOLD.')
+@click.option('--max-bucket', type=int, default=None,
+              help='Ignore blocking keys shared by more vendors than this. '
+                   'Defaults to DEDUP_MAX_BUCKET.')
+@click.option('--csv', 'as_csv', is_flag=True, help='Write the report as CSV.')
+@click.option('--rebuild-index', is_flag=True,
+              help='Recompute every vendor\'s blocking keys first.')
+def duplicates_command(threshold, max_bucket, as_csv, rebuild_index):
+    """Report probable duplicate vendors, best matches first."""
+    import csv
+    import sys
+    from flask import current_app
+    from ..models.dedup import rebuild_blocking_keys
+    from ..utils.dedup import find_duplicates
+
+    config = current_app.config
+    started = time.perf_counter()
+    if rebuild_index:
+        count = rebuild_blocking_keys()
+        click.echo(f'Indexed {count} vendors in {time.perf_counter() - started:.1f}s',
+                   err=True)
+    pairs = sorted(find_duplicates(
+        threshold if threshold is not None else config['DEDUP_THRESHOLD'],
+        max_bucket if max_bucket is not None else config['DEDUP_MAX_BUCKET']),
+        key=lambda pair: (-pair.score, pair.first.id, pair.second.id))
+    if as_csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['score', 'vendor_id', 'vendor_name', 'duplicate_id',
+                         'duplicate_name', 'reasons'])
+        for pair in pairs:
+            writer.writerow([pair.score, pair.first.id, pair.first.name,
+                             pair.second.id, pair.second.name, '; '.join(pair.reasons)])
+    else:
+        for pair in pairs:
+            click.echo(f'{pair.score:.2f}  #{pair.first.id} {pair.first.name!r} ~ '
+                       f'#{pair.second.id} {pair.second.name!r}  ({", ".join(pair.reasons)})')
+    click.echo(f'{len(pairs)} probable duplicate pair(s) in '
+               f'{time.perf_counter() - started:.1f}s', err=True)
+
+
+@vendors_cli.command('typeahead')
+@click.argument('queries', nargs=-1)
+def typeahead_command(queries):
+    """Build the autocomplete index and report its size and speed.
+
+    Each QUERY is looked up and timed.
+    """
+    from ..utils.typeahead import vendor_typeahead
+
+    vendor_typeahead.build()
+    stats = vendor_typeahead.stats()
+    click.echo(f"{stats['vendors']} vendors, {stats['entries']} keys, "
+               f"{stats['bytes'] / 1024 / 1024:.1f} MiB, "
+               f"built in {stats['build_seconds']:.2f}s")
+    for query in queries:
+        started = time.perf_counter()
+        matches = vendor_typeahead.search(query)
+        elapsed = time.perf_counter() - started
+        click.echo(f'{query!r}: {len(matches)} match(es) in {elapsed * 1e6:.0f} µs')
+        for id, name, tax_id in matches:
+            click.echo(f'  #{id} {name}' + (f' ({tax_id})' if tax_id else ''))
@@ -8,11 +8,143 @@ class Config:
     # Basic Flask config
     APP_NAME = os.environ.get("APP_NAME", "Pai Church ERP")
     SECRET_KEY = os.environ.get("SECRET_KEY", "default-secret-key")
+
+    # Blueprint modules (each exporting ``bp``) imported by create_app,
+    # relative to the app package.
+    BLUEPRINTS = (".blueprints.auth", ".blueprints.main", ".blueprints.vendor")
+
+    # Optional extensions are only imported when enabled.  The debug toolbar
+    # follows DEBUG unless DEBUG_TB_ENABLED is set; Flask-Migrate loads under
+    # the `flask` CLI unless MIGRATE_ENABLED is set.
+    MIGRATE_ENABLED = None
     
     # SQLAlchemy config
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///dev.db")
+
+    # Engine profile (see engine_options).  Pool settings apply to server
+    # databases; SQLite gets the pragmas instead, set on every connection.
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = True
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",      # readers no longer block on the writer
+        "synchronous": "NORMAL",    # safe with WAL, fsync on checkpoint only
+        "busy_timeout": 5000,
+        "cache_size": -64000,       # 64 MiB page cache
+        "mmap_size": 268435456,     # 256 MiB memory-mapped I/O
+        "temp_store": "MEMORY",
+    }
+
+    # Optional read replica; GET views read from it, writes go to the primary.
+    READ_DATABASE_URL = os.environ.get("READ_DATABASE_URL")
+    READ_REPLICA_STICKY_SECONDS = int(os.environ.get("READ_REPLICA_STICKY_SECONDS", 5))
     
+    # Vendor listing
+    VENDORS_PER_PAGE = 12
+    VENDOR_COUNT_CACHE_TTL = int(os.environ.get("VENDOR_COUNT_CACHE_TTL", 60))
+
+    # Identity cache for the Flask-Login user loader.  Set
+    # IDENTITY_CACHE_URL (redis://..., or local:// for the in-process
+    # stand-in) to share snapshots between worker processes.
+    IDENTITY_CACHE_URL = os.environ.get("IDENTITY_CACHE_URL")
+    IDENTITY_CACHE_SIZE = int(os.environ.get("IDENTITY_CACHE_SIZE", 1024))
+    IDENTITY_CACHE_TTL = int(os.environ.get("IDENTITY_CACHE_TTL", 60))
+    IDENTITY_CACHE_LOCAL_TTL = int(os.environ.get("IDENTITY_CACHE_LOCAL_TTL", 5))
+
+    # Seconds a worker may serve cached reference tables (categories, roles)
+    # changed by another process.
+    REFERENCE_CACHE_TTL = int(os.environ.get("REFERENCE_CACHE_TTL", 300))
+
+    # Duplicate-vendor detection: pairs scoring DEDUP_THRESHOLD or more are
+    # reported; blocking keys shared by more than DEDUP_MAX_BUCKET vendors
+    # are too common to generate candidates from.
+    DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", 0.85))
+    DEDUP_MAX_BUCKET = int(os.environ.get("DEDUP_MAX_BUCKET", 50))
+
+    # Change feed (/vendors/changes/<entity>, `flask changes`): changes
+    # younger than CHANGE_FEED_LAG_SECONDS are held back until concurrent
+    # transactions have committed; tombstones are kept for
+    # CHANGE_FEED_RETENTION_DAYS, and a cursor is refused (410) once
+    # tombstones after it have been pruned.
+    CHANGE_FEED_LAG_SECONDS = int(os.environ.get("CHANGE_FEED_LAG_SECONDS", 5))
+    CHANGE_FEED_PAGE_SIZE = int(os.environ.get("CHANGE_FEED_PAGE_SIZE", 500))
+    CHANGE_FEED_MAX_PAGE_SIZE = int(os.environ.get("CHANGE_FEED_MAX_PAGE_SIZE", 5000))
+    CHANGE_FEED_RETENTION_DAYS = int(os.environ.get("CHANGE_FEED_RETENTION_DAYS", 90))
+
+    # Compiled templates are cached on disk (default: instance/jinja_cache)
+    # so new workers skip compiling them.  Rendered {% cache %} fragments
+    # are kept in process, FRAGMENT_CACHE_SIZE entries for at most
+    # FRAGMENT_CACHE_TTL seconds; 0 entries disables fragment caching.
+    JINJA_BYTECODE_CACHE = True
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get("JINJA_BYTECODE_CACHE_DIR")
+    FRAGMENT_CACHE_SIZE = int(os.environ.get("FRAGMENT_CACHE_SIZE", 2000))
+    FRAGMENT_CACHE_TTL = int(os.environ.get("FRAGMENT_CACHE_TTL", 600))
+
+    # Vendor autocomplete index: other processes' changes are picked up
+    # from the change feed at most every TYPEAHEAD_SYNC_SECONDS.
+    TYPEAHEAD_SYNC_SECONDS = int(os.environ.get("TYPEAHEAD_SYNC_SECONDS", 10))
+    TYPEAHEAD_MAX_RESULTS = int(os.environ.get("TYPEAHEAD_MAX_RESULTS", 20))
+
+    # Static assets.  `flask assets build` downloads VENDOR_ASSETS (static
+    # path: source URL) into app/static and writes fingerprinted,
+    # precompressed copies to app/static/dist.  With ASSETS_USE_MANIFEST
+    # url_for('static') links to those copies, which are served with a
+    # Cache-Control max-age of ASSETS_MAX_AGE seconds.  Vendored files
+    # that have not been downloaded yet are loaded from their source URL.
+    VENDOR_ASSETS = {
+        "vendor/bootstrap/css/bootstrap.min.css":
+            "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css",
+        "vendor/fontawesome/css/all.min.css":
+            "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css",
+        "vendor/alpinejs/alpine.min.js":
+            "https://cdn.jsdelivr.net/gh/alpinejs/alpine@v2.8.2/dist/alpine.min.js",
+    }
+    ASSETS_USE_MANIFEST = os.environ.get("ASSETS_USE_MANIFEST", "true").lower() == "true"
+    ASSETS_MAX_AGE = int(os.environ.get("ASSETS_MAX_AGE", 365 * 24 * 3600))
+
+    # Tables small enough that `flask check-query-plans` accepts full scans.
+    QUERY_PLAN_ALLOWED_SCANS = ("roles", "vendor_categories")
+
+    # Request instrumentation (Server-Timing header, slow logs, metrics).
+    # METRICS_PATH requires METRICS_TOKEN as a bearer token; without a
+    # token it is only served in debug and testing.
+    INSTRUMENTATION_ENABLED = os.environ.get("INSTRUMENTATION_ENABLED", "True").lower() == "true"
+    SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", 500))
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 100))
+    METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+    # Vendor document storage.  STORAGE_ROOT defaults to instance/blobs.
+    # Set STORAGE_ACCEL_REDIRECT to an nginx internal location mapped to
+    # STORAGE_ROOT to offload downloads with X-Accel-Redirect, or
+    # USE_X_SENDFILE for servers that understand X-Sendfile.
+    STORAGE_ROOT = os.environ.get("STORAGE_ROOT")
+    STORAGE_ACCEL_REDIRECT = os.environ.get("STORAGE_ACCEL_REDIRECT")
+    USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE", "False").lower() == "true"
+    MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH", 50 * 1024 * 1024))
+
+    # Background jobs.  The in-process scheduler is off by default; the jobs
+    # can also be run from cron with e.g. `flask documents scan-expiring`.
+    SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "False").lower() == "true"
+    DOCUMENT_EXPIRY_DAYS = int(os.environ.get("DOCUMENT_EXPIRY_DAYS", 30))
+    DOCUMENT_EXPIRY_SCAN_INTERVAL = int(os.environ.get("DOCUMENT_EXPIRY_SCAN_INTERVAL", 3600))
+
+    # Password hashing and login throttling.  Hashes run on a pool of
+    # PASSWORD_HASH_WORKERS threads; at most PASSWORD_HASH_QUEUE more may
+    # wait before logins are answered with 503.  Stored hashes that do not
+    # match PASSWORD_HASH_METHOD (werkzeug syntax, e.g. "scrypt:32768:8:1"
+    # or "pbkdf2:sha256:600000") are upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 8))
+    PASSWORD_HASH_ADMISSION_TIMEOUT = float(os.environ.get("PASSWORD_HASH_ADMISSION_TIMEOUT", 2.0))
+    LOGIN_THROTTLE_WINDOW = int(os.environ.get("LOGIN_THROTTLE_WINDOW", 300))
+    LOGIN_MAX_FAILURES_PER_USER = int(os.environ.get("LOGIN_MAX_FAILURES_PER_USER", 5))
+    LOGIN_MAX_FAILURES_PER_IP = int(os.environ.get("LOGIN_MAX_FAILURES_PER_IP", 20))
+
     # Email config
     MAIL_SERVER = os.environ.get("MAIL_SERVER")
     MAIL_PORT = int(os.environ.get("MAIL_PORT", 587))
@@ -20,6 +152,22 @@ class Config:
     MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
     MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.environ.get("MAIL_DEFAULT_SENDER", MAIL_USERNAME)
+    MAIL_TIMEOUT = int(os.environ.get("MAIL_TIMEOUT", 30))
+
+    # Mail outbox.  Mail is queued in the database and sent by
+    # `flask mail drain` or the scheduler's mail-outbox job.
+    MAIL_WORKERS = int(os.environ.get("MAIL_WORKERS", 4))
+    MAIL_BATCH_SIZE = int(os.environ.get("MAIL_BATCH_SIZE", 100))
+    MAIL_MAX_ATTEMPTS = int(os.environ.get("MAIL_MAX_ATTEMPTS", 6))
+    MAIL_RETRY_BASE_SECONDS = int(os.environ.get("MAIL_RETRY_BASE_SECONDS", 60))
+    MAIL_RETRY_MAX_SECONDS = int(os.environ.get("MAIL_RETRY_MAX_SECONDS", 6 * 3600))
+    MAIL_CLAIM_TIMEOUT = int(os.environ.get("MAIL_CLAIM_TIMEOUT", 900))
+    MAIL_OUTBOX_INTERVAL = int(os.environ.get("MAIL_OUTBOX_INTERVAL", 60))
+    # Comma separated addresses notified about expiring documents; when
+    # unset the expiry scanner only logs.
+    DOCUMENT_EXPIRY_NOTIFY = [address.strip() for address in
+                              os.environ.get("DOCUMENT_EXPIRY_NOTIFY", "").split(",")
+                              if address.strip()]
 
     # Session config
     SESSION_COOKIE_SECURE = True
@@ -31,12 +179,19 @@ class DevelopmentConfig(Config):
     DEBUG = True
     DEBUG_TB_INTERCEPT_REDIRECTS = False
     SESSION_COOKIE_SECURE = False
+    # Cached fragments and built assets would hide edits to the templates
+    # and static files.
+    FRAGMENT_CACHE_SIZE = int(os.environ.get("FRAGMENT_CACHE_SIZE", 0))
+    ASSETS_USE_MANIFEST = os.environ.get("ASSETS_USE_MANIFEST", "false").lower() == "true"
 
 class ProductionConfig(Config):
     """Production configuration."""
     
     DEBUG = False
     
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+
     # Production security headers
     STRICT_SLASHES = True
     SESSION_COOKIE_HTTPONLY = True
@@ -48,8 +203,25 @@ class TestingConfig(Config):
     
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLITE_PRAGMAS = {}
+    READ_DATABASE_URL = None
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
     WTF_CSRF_ENABLED = False
 
+def engine_options(app_config, url=None):
+    """Build ``create_engine`` keyword arguments for the configured profile."""
+    url = url or app_config["SQLALCHEMY_DATABASE_URI"]
+    if url.startswith("sqlite"):
+        # SQLite uses a singleton/static pool; queue pool sizing does not apply.
+        return {}
+    return {
+        "pool_size": app_config["DB_POOL_SIZE"],
+        "max_overflow": app_config["DB_MAX_OVERFLOW"],
+        "pool_timeout": app_config["DB_POOL_TIMEOUT"],
+        "pool_recycle": app_config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": app_config["DB_POOL_PRE_PING"],
+    }
+
 config = {
     "development": DevelopmentConfig,
     "production": ProductionConfig,
@@ -1,20 +1,49 @@
 """Flask extensions module."""
-from flask_debugtoolbar import DebugToolbarExtension
-from flask_migrate import Migrate
+import os
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from sqlalchemy import event
+from ..config import engine_options
+from ..utils.startup import timed
+from .routing import RoutingSession, REPLICA_BIND, mark_primary_sticky
 
 # Initialize extensions
-db = SQLAlchemy()
-migrate = Migrate()
-toolbar = DebugToolbarExtension()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 
+# Optional extensions, imported and created only when enabled.
+migrate = None
+toolbar = None
+
 def init_extensions(app):
-    """Initialize Flask extensions."""
-    db.init_app(app)
-    migrate.init_app(app, db)
-    toolbar.init_app(app)
+    """Initialize Flask extensions, recording each one's startup cost."""
+    with timed(app, 'extensions.database'):
+        init_database(app)
+    if migrations_enabled(app):
+        with timed(app, 'extensions.migrate'):
+            init_migrate(app)
+    if debug_toolbar_enabled(app):
+        with timed(app, 'extensions.debug_toolbar'):
+            init_debug_toolbar(app)
+
+    from ..utils import assets, instrumentation, storage
+    from ..utils.passwords import password_hasher, login_throttle
+    from ..utils.identity import identity_cache
+    from ..utils.reference import reference_cache
+    from ..utils.typeahead import vendor_typeahead
+    with timed(app, 'extensions.caches'):
+        identity_cache.init_app(app)
+        reference_cache.init_app(app)
+        vendor_typeahead.init_app(app)
+    with timed(app, 'extensions.instrumentation'):
+        instrumentation.init_app(app)
+    with timed(app, 'extensions.storage'):
+        storage.init_app(app)
+    with timed(app, 'extensions.assets'):
+        assets.init_app(app)
+    with timed(app, 'extensions.passwords'):
+        password_hasher.init_app(app)
+        login_throttle.init_app(app)
     
     # Configure Flask-Login
     login_manager.init_app(app)
@@ -23,5 +52,65 @@ def init_extensions(app):
     
     @login_manager.user_loader
     def load_user(user_id):
-        from ..models import User
-        return User.query.get(int(user_id))
\ No newline at end of file
+        return identity_cache.load(int(user_id))
+
+def migrations_enabled(app):
+    """Flask-Migrate (and Alembic) are only needed by the ``flask db`` commands.
+
+    ``MIGRATE_ENABLED`` forces them on or off; by default they are loaded
+    when running under the ``flask`` CLI and skipped in WSGI workers.
+    """
+    enabled = app.config.get('MIGRATE_ENABLED')
+    if enabled is None:
+        return os.environ.get('FLASK_RUN_FROM_CLI') == 'true'
+    return enabled
+
+def init_migrate(app):
+    global migrate
+    from flask_migrate import Migrate
+    if migrate is None:
+        migrate = Migrate()
+    migrate.init_app(app, db)
+
+def debug_toolbar_enabled(app):
+    """Mirror the toolbar's own ``DEBUG_TB_ENABLED`` default of ``app.debug``."""
+    return app.config.get('DEBUG_TB_ENABLED', app.debug)
+
+def init_debug_toolbar(app):
+    global toolbar
+    try:
+        from flask_debugtoolbar import DebugToolbarExtension
+    except ImportError:
+        app.logger.warning('DEBUG_TB_ENABLED is set but flask-debugtoolbar is not installed')
+        return
+    if toolbar is None:
+        toolbar = DebugToolbarExtension()
+    toolbar.init_app(app)
+
+def init_database(app):
+    """Configure the engines from the config's engine profile."""
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    replica_url = app.config.get('READ_DATABASE_URL')
+    if replica_url:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA_BIND] = dict(engine_options(app.config, replica_url),
+                                   url=replica_url)
+        app.config['SQLALCHEMY_BINDS'] = binds
+    db.init_app(app)
+
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite' and pragmas:
+                event.listen(engine, 'connect', _sqlite_pragma_setter(pragmas))
+    if not event.contains(db.session, 'after_commit', mark_primary_sticky):
+        event.listen(db.session, 'after_commit', mark_primary_sticky)
+
+
+def _sqlite_pragma_setter(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+    return set_pragmas
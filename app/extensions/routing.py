@@ -0,0 +1,47 @@
+"""Read/write routing between the primary database and a read replica."""
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def use_primary():
+    """Send the rest of the current request's queries to the primary."""
+    g.db_use_primary = True
+
+
+def _reads_from_replica():
+    if not has_request_context() or request.method not in SAFE_METHODS:
+        return False
+    if g.get('db_use_primary'):
+        return False
+    # Read-your-writes: stay on the primary for a while after this client
+    # committed a write, so the redirect after a POST sees it.
+    return session.get('db_primary_until', 0) < time.time()
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of safe requests to the read replica.
+
+    Used when the ``replica`` bind is configured (``READ_DATABASE_URL``).
+    Flushes, DML statements and everything outside GET/HEAD/OPTIONS requests
+    go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None and _reads_from_replica():
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def mark_primary_sticky(db_session):
+    """After a commit in an unsafe request, pin the client to the primary."""
+    if (has_request_context() and request.method not in SAFE_METHODS
+            and REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {})):
+        session['db_primary_until'] = (
+            time.time() + current_app.config['READ_REPLICA_STICKY_SECONDS'])
@@ -0,0 +1,7 @@
+"""Background jobs package."""
+from .scheduler import Scheduler, init_scheduler
+
+__all__ = [
+    'Scheduler',
+    'init_scheduler'
+]
@@ -0,0 +1,104 @@
+"""Scanner for vendor documents that are about to expire."""
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import select, tuple_, exists, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from ..extensions import db
+from ..models import VendorDocument, VendorDocumentNotice
+
+# Consecutive claim conflicts on one batch before the scan gives up.
+MAX_BATCH_CONFLICTS = 5
+
+
+def log_expiring_documents(documents):
+    """Default notifier: log each expiring document."""
+    for document in documents:
+        current_app.logger.info(
+            'Document %s (%s) of vendor %s expires on %s', document.id,
+            document.name, document.vendor.name, document.expiry_date)
+
+
+def mail_expiring_documents(documents):
+    """Queue one digest email per batch to ``DOCUMENT_EXPIRY_NOTIFY``.
+
+    The message is added to the outbox in the scanner's transaction, so it
+    is only sent if the batch's notices commit.
+    """
+    from .mail import enqueue_mail
+
+    lines = [f'- {document.vendor.name}: {document.name} expires on {document.expiry_date}'
+             for document in documents]
+    enqueue_mail(current_app.config['DOCUMENT_EXPIRY_NOTIFY'],
+                 f'{len(documents)} vendor document(s) expiring soon',
+                 '\n'.join(lines))
+
+
+def scan_expiring_documents(days=30, batch_size=500, notify=None, today=None):
+    """Notify about documents expiring within ``days`` days; returns the count.
+
+    Documents are read with a range scan on ``(expiry_date, id)`` in keyset
+    ordered batches, skipping those already notified about for their current
+    expiry date, so a repeated run only touches documents in the window and
+    only notifies new ones.  Each batch records its notices and calls
+    ``notify(documents)`` in one transaction: if notifying fails the notices
+    roll back and the documents are picked up again by the next run.  A
+    batch partly claimed by a concurrent scanner is read again, without the
+    documents the other scanner claimed.
+    """
+    if notify is None:
+        notify = (mail_expiring_documents
+                  if current_app.config.get('DOCUMENT_EXPIRY_NOTIFY')
+                  else log_expiring_documents)
+    today = today or date.today()
+    horizon = today + timedelta(days=days)
+    already_notified = exists().where(and_(
+        VendorDocumentNotice.document_id == VendorDocument.id,
+        VendorDocumentNotice.expiry_date == VendorDocument.expiry_date))
+
+    notified = 0
+    last_key = None
+    conflicts = 0
+    while True:
+        stmt = (select(VendorDocument)
+                .options(joinedload(VendorDocument.vendor))
+                .where(VendorDocument.expiry_date >= today,
+                       VendorDocument.expiry_date <= horizon,
+                       ~already_notified)
+                .order_by(VendorDocument.expiry_date, VendorDocument.id)
+                .limit(batch_size))
+        if last_key is not None:
+            stmt = stmt.where(tuple_(VendorDocument.expiry_date,
+                                     VendorDocument.id) > tuple_(*last_key))
+        documents = db.session.execute(stmt).scalars().all()
+        if not documents:
+            break
+        batch_key = (documents[-1].expiry_date, documents[-1].id)
+
+        try:
+            db.session.add_all(
+                VendorDocumentNotice(document_id=document.id,
+                                     expiry_date=document.expiry_date)
+                for document in documents)
+            # Claim the batch before notifying: a concurrent scanner that
+            # got there first makes this flush fail instead of notifying twice.
+            db.session.flush()
+            notify(documents)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            # Each retry excludes the notices the other scanner committed,
+            # so conflicts only repeat while it keeps racing this one.
+            conflicts += 1
+            if conflicts > MAX_BATCH_CONFLICTS:
+                raise
+            continue
+        except Exception:
+            db.session.rollback()
+            raise
+        last_key = batch_key
+        conflicts = 0
+        notified += len(documents)
+        if len(documents) < batch_size:
+            break
+    return notified
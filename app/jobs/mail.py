@@ -0,0 +1,225 @@
+"""Mail outbox: enqueueing from views and a pooled SMTP worker.
+
+Views call :func:`enqueue_mail`, which only adds an ``OutboxMessage`` to the
+session.  :func:`drain_outbox` (run by ``flask mail drain`` or the
+scheduler) claims due messages in batches and sends them from a small
+thread pool whose SMTP connections are reused for the whole drain.  Failed
+sends are retried with exponential backoff and dead-lettered after
+``MAIL_MAX_ATTEMPTS``.
+
+For local testing point ``MAIL_SERVER``/``MAIL_PORT`` at an SMTP stand-in,
+e.g. ``python -m aiosmtpd -n -l localhost:8025`` with ``MAIL_USE_TLS=False``.
+"""
+import smtplib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from queue import Empty, LifoQueue
+from flask import current_app
+from sqlalchemy import select, update
+from ..extensions import db
+from ..models import OutboxMessage
+
+
+def enqueue_mail(recipients, subject, body, html=None, sender=None):
+    """Queue an email; it is sent after the caller's transaction commits."""
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    message = OutboxMessage(
+        sender=sender or current_app.config.get('MAIL_DEFAULT_SENDER'),
+        recipients=','.join(recipients),
+        subject=subject,
+        body=body,
+        html=html,
+        status=OutboxMessage.PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(message)
+    return message
+
+
+class SMTPConnectionPool:
+    """Up to ``size`` SMTP connections, opened on demand and reused."""
+
+    def __init__(self, config, size):
+        self.config = config
+        self.size = size
+        self._idle = LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.config['MAIL_SERVER'], self.config['MAIL_PORT'],
+                            timeout=self.config['MAIL_TIMEOUT'])
+        if self.config.get('MAIL_USE_TLS'):
+            smtp.starttls()
+        if self.config.get('MAIL_USERNAME'):
+            smtp.login(self.config['MAIL_USERNAME'], self.config['MAIL_PASSWORD'])
+        return smtp
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if not can_open:
+            return self._idle.get()
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def release(self, smtp, broken=False):
+        if broken:
+            with self._lock:
+                self._opened -= 1
+            try:
+                smtp.close()
+            except Exception:
+                pass
+        else:
+            self._idle.put(smtp)
+
+    def close(self):
+        while True:
+            try:
+                smtp = self._idle.get_nowait()
+            except Empty:
+                break
+            try:
+                smtp.quit()
+            except Exception:
+                smtp.close()
+        self._opened = 0
+
+
+def _build_message(message):
+    email = EmailMessage()
+    email['From'] = message['sender']
+    email['To'] = ', '.join(message['recipients'])
+    email['Subject'] = message['subject']
+    email.set_content(message['body'])
+    if message['html']:
+        email.add_alternative(message['html'], subtype='html')
+    return email
+
+
+def _send(pool, message):
+    """Send one message; returns ``None`` or the error text."""
+    for attempt in range(2):
+        try:
+            smtp = pool.acquire()
+        except Exception as exc:
+            return f'connect: {exc}'
+        try:
+            smtp.send_message(_build_message(message))
+        except smtplib.SMTPServerDisconnected as exc:
+            # A pooled connection timed out; retry once on a fresh one.
+            pool.release(smtp, broken=True)
+            if attempt:
+                return str(exc)
+            continue
+        except (smtplib.SMTPException, OSError) as exc:
+            pool.release(smtp, broken=isinstance(exc, OSError))
+            return str(exc)
+        pool.release(smtp)
+        return None
+
+
+def _claim_batch(batch_size, now):
+    token = uuid.uuid4().hex
+    due = (select(OutboxMessage.id)
+           .where(OutboxMessage.status == OutboxMessage.PENDING,
+                  OutboxMessage.next_attempt_at <= now)
+           .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+           .limit(batch_size))
+    ids = db.session.execute(due).scalars().all()
+    if not ids:
+        return token, []
+    # Only rows still pending are claimed, so concurrent workers never
+    # claim the same message.
+    db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(ids),
+               OutboxMessage.status == OutboxMessage.PENDING)
+        .values(status=OutboxMessage.SENDING, claim_token=token, claimed_at=now)
+        .execution_options(synchronize_session=False))
+    db.session.commit()
+    rows = db.session.execute(
+        select(OutboxMessage.id, OutboxMessage.sender, OutboxMessage.recipients,
+               OutboxMessage.subject, OutboxMessage.body, OutboxMessage.html,
+               OutboxMessage.attempts)
+        .where(OutboxMessage.claim_token == token)).all()
+    return token, [dict(row._mapping, recipients=row.recipients.split(','))
+                   for row in rows]
+
+
+def _release_stale_claims(now, config):
+    """Return messages claimed by a worker that died back to the queue."""
+    cutoff = now - timedelta(seconds=config['MAIL_CLAIM_TIMEOUT'])
+    db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.status == OutboxMessage.SENDING,
+               OutboxMessage.claimed_at < cutoff)
+        .values(status=OutboxMessage.PENDING, claim_token=None)
+        .execution_options(synchronize_session=False))
+    db.session.commit()
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """Send due messages until the queue is empty; returns ``(sent, failed)``."""
+    config = current_app.config
+    batch_size = batch_size or config['MAIL_BATCH_SIZE']
+    _release_stale_claims(datetime.utcnow(), config)
+    pool = SMTPConnectionPool(config, config['MAIL_WORKERS'])
+    sent = failed = batches = 0
+    try:
+        with ThreadPoolExecutor(max_workers=config['MAIL_WORKERS'],
+                                thread_name_prefix='mail') as executor:
+            while max_batches is None or batches < max_batches:
+                now = datetime.utcnow()
+                token, messages = _claim_batch(batch_size, now)
+                if not messages:
+                    break
+                batches += 1
+                errors = list(executor.map(lambda m: _send(pool, m), messages))
+                for message, error in zip(messages, errors):
+                    if error is None:
+                        sent += 1
+                        values = {'status': OutboxMessage.SENT, 'sent_at': datetime.utcnow(),
+                                  'last_error': None}
+                    else:
+                        failed += 1
+                        values = _failure_values(message['attempts'] + 1, error, config)
+                    db.session.execute(
+                        update(OutboxMessage)
+                        .where(OutboxMessage.id == message['id'],
+                               OutboxMessage.claim_token == token)
+                        .values(claim_token=None, **values)
+                        .execution_options(synchronize_session=False))
+                db.session.commit()
+    finally:
+        pool.close()
+    return sent, failed
+
+
+def _failure_values(attempts, error, config):
+    if attempts >= config['MAIL_MAX_ATTEMPTS']:
+        current_app.logger.error('Dead-lettering email after %d attempts: %s',
+                                 attempts, error)
+        return {'status': OutboxMessage.DEAD, 'attempts': attempts,
+                'last_error': error}
+    delay = min(config['MAIL_RETRY_BASE_SECONDS'] * 2 ** (attempts - 1),
+                config['MAIL_RETRY_MAX_SECONDS'])
+    return {'status': OutboxMessage.PENDING, 'attempts': attempts,
+            'last_error': error,
+            'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay)}
@@ -0,0 +1,95 @@
+"""In-process interval scheduler for background jobs."""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Runs registered jobs at fixed intervals on a daemon thread.
+
+    Each job runs inside an application context.  A failing job is logged
+    and retried at its next interval; it does not stop the others.
+    """
+
+    def __init__(self, app, tick=1.0):
+        self.app = app
+        self.tick = tick
+        self.jobs = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, name, func, interval):
+        """Run ``func()`` every ``interval`` seconds, first after one interval."""
+        self.jobs.append({'name': name, 'func': func, 'interval': interval,
+                          'next_run': time.monotonic() + interval})
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='scheduler',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_pending(self):
+        """Run every job that is due; returns the names of the jobs run."""
+        ran = []
+        now = time.monotonic()
+        for job in self.jobs:
+            if job['next_run'] > now:
+                continue
+            job['next_run'] = now + job['interval']
+            with self.app.app_context():
+                try:
+                    job['func']()
+                except Exception:
+                    logger.exception('Scheduled job %s failed', job['name'])
+                finally:
+                    from ..extensions import db
+                    db.session.remove()
+            ran.append(job['name'])
+        return ran
+
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            self.run_pending()
+
+
+def init_scheduler(app):
+    """Start the scheduler thread when ``SCHEDULER_ENABLED`` is set.
+
+    Enable it in one process only (e.g. a single worker or a dedicated
+    process); the jobs are safe to run concurrently but would do the work
+    twice.
+    """
+    if not app.config.get('SCHEDULER_ENABLED'):
+        return None
+    # Under the reloader only the child process serves requests.
+    if app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return None
+    from .expiry import scan_expiring_documents
+    from .mail import drain_outbox
+    from ..utils.change_feed import prune_tombstones
+
+    scheduler = Scheduler(app)
+    scheduler.add_job(
+        'document-expiry',
+        lambda: scan_expiring_documents(app.config['DOCUMENT_EXPIRY_DAYS']),
+        app.config['DOCUMENT_EXPIRY_SCAN_INTERVAL'])
+    scheduler.add_job('mail-outbox', drain_outbox,
+                      app.config['MAIL_OUTBOX_INTERVAL'])
+    scheduler.add_job(
+        'tombstone-prune',
+        lambda: prune_tombstones(app.config['CHANGE_FEED_RETENTION_DAYS']),
+        24 * 60 * 60)
+    app.extensions['scheduler'] = scheduler
+    scheduler.start()
+    return scheduler
@@ -1,15 +1,27 @@
 """Models package."""
-from .base import BaseModel
+from .base import BaseModel, unit_of_work
 from .user import User, Role, Permission
-from .vendor import Vendor, VendorCategory, VendorContact, VendorDocument
+from .outbox import OutboxMessage
+from .vendor import (Vendor, VendorCategory, VendorContact, VendorDocument,
+                     VendorDocumentNotice)
+from .dashboard import DashboardCounter
+from .dedup import vendor_blocking_keys
+from .changes import Tombstone, TombstoneWatermark
 
 __all__ = [
     'BaseModel',
+    'unit_of_work',
     'User',
     'Role',
     'Permission',
+    'OutboxMessage',
     'Vendor',
     'VendorCategory',
     'VendorContact',
-    'VendorDocument'
+    'VendorDocument',
+    'VendorDocumentNotice',
+    'DashboardCounter',
+    'vendor_blocking_keys',
+    'Tombstone',
+    'TombstoneWatermark'
 ]
\ No newline at end of file
@@ -1,10 +1,51 @@
 """Base model module."""
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import groupby, islice
+from sqlalchemy import insert, update, and_
+from sqlalchemy.dialects import postgresql, sqlite
 from ..extensions import db
 
+_UNIT_OF_WORK = 'unit_of_work_depth'
+
+@contextmanager
+def unit_of_work():
+    """Group saves and deletes into a single transaction.
+
+    Inside the block ``save()`` and ``delete()`` only stage their changes;
+    the outermost block commits once on exit, or rolls back if it raises.
+    Nested blocks join the enclosing one.  Primary keys of new objects are
+    assigned at the next flush (``db.session.flush()`` forces one).
+    """
+    session = db.session
+    depth = session.info.get(_UNIT_OF_WORK, 0)
+    session.info[_UNIT_OF_WORK] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            session.commit()
+    except BaseException:
+        if depth == 0:
+            session.rollback()
+        raise
+    finally:
+        session.info[_UNIT_OF_WORK] = depth
+
+def in_unit_of_work():
+    """Whether a ``unit_of_work()`` block is active in this session."""
+    return db.session.info.get(_UNIT_OF_WORK, 0) > 0
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
 class BaseModel(db.Model):
     """Base model class that includes common fields and methods."""
-    
+
     __abstract__ = True
 
     id = db.Column(db.Integer, primary_key=True)
@@ -12,16 +53,91 @@ class BaseModel(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def save(self):
-        """Save the model instance."""
+        """Save the model instance (committed at the end of a unit of work)."""
         db.session.add(self)
-        db.session.commit()
+        if not in_unit_of_work():
+            db.session.commit()
 
     def delete(self):
-        """Delete the model instance."""
+        """Delete the model instance (committed at the end of a unit of work)."""
         db.session.delete(self)
-        db.session.commit()
+        if not in_unit_of_work():
+            db.session.commit()
 
     @classmethod
     def get_by_id(cls, id):
         """Get a record by ID."""
-        return cls.query.get(id)
\ No newline at end of file
+        return cls.query.get(id)
+
+    # Bulk writes.  These are multi-row statements that bypass the ORM unit
+    # of work, so flush hooks (such as the dashboard counters) do not see
+    # them.  They run in a unit of work of their own, so outside one they
+    # commit on success and roll back on error.  Models whose flush hooks
+    # maintain other tables set ``__bulk_writes__ = False`` and refuse them.
+    __bulk_writes__ = True
+
+    @classmethod
+    def _check_bulk_writes(cls):
+        if not cls.__bulk_writes__:
+            raise TypeError(f'{cls.__name__} has flush hooks that bulk writes '
+                            f'would bypass; write its rows through the ORM')
+
+    @classmethod
+    def _stamped(cls, rows, now):
+        """Rows with ``created_at``/``updated_at`` set, grouped by their keys."""
+        rows = [{'created_at': now, **row, 'updated_at': now} for row in rows]
+        rows.sort(key=lambda row: sorted(row))
+        return [list(group) for _, group in groupby(rows, key=lambda row: sorted(row))]
+
+    @classmethod
+    def bulk_insert(cls, rows, batch_size=1000):
+        """Insert ``rows`` (dicts of column values); returns the row count."""
+        cls._check_bulk_writes()
+        count = 0
+        with unit_of_work():
+            for batch in _batches(rows, batch_size):
+                for group in cls._stamped(batch, datetime.utcnow()):
+                    db.session.execute(insert(cls), group)
+                    count += len(group)
+        return count
+
+    @classmethod
+    def bulk_upsert(cls, rows, index_elements, update_columns=None, batch_size=1000):
+        """Insert ``rows``, updating those that collide on ``index_elements``.
+
+        ``index_elements`` must match a unique constraint or index.  On a
+        conflict ``update_columns`` (by default every column given in the
+        row except the conflict keys and ``created_at``) are overwritten
+        and ``updated_at`` is refreshed; ``created_at`` is kept.  Uses
+        ``INSERT ... ON CONFLICT DO UPDATE`` on SQLite and PostgreSQL and an
+        update-then-insert per row elsewhere.  Returns the row count.
+        """
+        cls._check_bulk_writes()
+        table = cls.__table__
+        dialect = db.session.get_bind(mapper=cls.__mapper__).dialect.name
+        keep = set(index_elements) | {'id', 'created_at'}
+        count = 0
+        with unit_of_work():
+            for batch in _batches(rows, batch_size):
+                for group in cls._stamped(batch, datetime.utcnow()):
+                    columns = [name for name in group[0]
+                               if name not in keep
+                               and (update_columns is None or name in update_columns
+                                    or name == 'updated_at')]
+                    if dialect in ('sqlite', 'postgresql'):
+                        module = sqlite if dialect == 'sqlite' else postgresql
+                        stmt = module.insert(table)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=index_elements,
+                            set_={name: stmt.excluded[name] for name in columns})
+                        db.session.execute(stmt, group)
+                    else:
+                        for row in group:
+                            match = and_(*(table.c[name] == row[name] for name in index_elements))
+                            result = db.session.execute(
+                                update(table).where(match)
+                                .values({name: row[name] for name in columns}))
+                            if not result.rowcount:
+                                db.session.execute(insert(table).values(row))
+                    count += len(group)
+        return count
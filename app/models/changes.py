@@ -0,0 +1,79 @@
+"""Tombstones for the change feed.
+
+The feed reads inserts and updates straight from each table's
+``(updated_at, id)`` index; deleted rows leave nothing behind there, so
+their deletion is recorded here.
+"""
+from datetime import datetime
+from sqlalchemy import event, insert, select, literal
+from .base import BaseModel, db
+from .vendor import Vendor, VendorContact, VendorDocument
+
+# Feed name of each model in the change feed.
+FEED_MODELS = {
+    'vendors': Vendor,
+    'contacts': VendorContact,
+    'documents': VendorDocument,
+}
+
+
+class Tombstone(BaseModel):
+    """A row deleted from one of the ``FEED_MODELS`` tables.
+
+    ``updated_at`` is the time of deletion, so tombstones are read with the
+    same ``(updated_at, id)`` cursor as the live rows.  ORM deletes are
+    recorded by the flush hook below; bulk ``DELETE`` statements must call
+    :meth:`record` first.
+    """
+
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        # The change feed's scan of one entity's deletions, in cursor order.
+        db.Index('ix_tombstones_entity_updated_at_entity_id',
+                 'entity', 'updated_at', 'entity_id'),
+    )
+
+    entity = db.Column(db.String(40), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+
+    @classmethod
+    def record(cls, entity, criteria, session=None):
+        """Add tombstones for the ``entity`` rows matching ``criteria``.
+
+        Runs as one ``INSERT ... SELECT``; call it in the same transaction,
+        before the ``DELETE`` with the same criteria.
+        """
+        session = session or db.session
+        model = FEED_MODELS[entity]
+        now = datetime.utcnow()
+        session.execute(insert(cls.__table__).from_select(
+            ['entity', 'entity_id', 'created_at', 'updated_at'],
+            select(literal(entity), model.id, literal(now), literal(now))
+            .where(*criteria)))
+
+
+class TombstoneWatermark(BaseModel):
+    """How far pruning has deleted an entity's tombstones.
+
+    A cursor at or before ``pruned_through`` may have missed deletions and
+    is refused; any later cursor is still complete, however old.
+    """
+
+    __tablename__ = 'tombstone_watermarks'
+
+    entity = db.Column(db.String(40), nullable=False, unique=True)
+    pruned_through = db.Column(db.DateTime, nullable=False)
+
+
+_FEED_NAMES = {model: entity for entity, model in FEED_MODELS.items()}
+
+
+@event.listens_for(db.session, 'after_flush')
+def record_deleted_rows(session, flush_context):
+    """Add tombstones for the flush's deleted feed rows."""
+    now = datetime.utcnow()
+    rows = [{'entity': _FEED_NAMES[type(obj)], 'entity_id': obj.id,
+             'created_at': now, 'updated_at': now}
+            for obj in session.deleted if type(obj) in _FEED_NAMES]
+    if rows:
+        session.execute(insert(Tombstone.__table__), rows)
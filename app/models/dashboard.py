@@ -0,0 +1,156 @@
+"""Precomputed dashboard aggregates."""
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, func, insert, select, update, delete, literal, cast
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm.attributes import get_history
+from .base import BaseModel, db
+from .vendor import Vendor, VendorDocument
+
+
+def vendor_buckets(status, category_id):
+    """Counter buckets a vendor with these values is counted in."""
+    return [('vendors', ''),
+            ('vendors.status', status or ''),
+            ('vendors.category', str(category_id) if category_id else '')]
+
+
+def document_buckets(expiry_date):
+    """Counter buckets a document with this expiry date is counted in."""
+    return [('documents.expiry', expiry_date.isoformat())] if expiry_date else []
+
+
+class DashboardCounter(BaseModel):
+    """A count kept current in the same transaction as the rows it counts.
+
+    ``metric`` names the aggregate and ``bucket`` the group within it:
+
+    * ``vendors`` (bucket ``''``): all vendors
+    * ``vendors.status``: vendors per status
+    * ``vendors.category``: vendors per category id, ``''`` for none
+    * ``documents.expiry``: documents per ISO expiry date, so a date window
+      is a short range of the unique index
+
+    ORM changes are counted by the flush hook below; bulk statements that
+    bypass the ORM unit of work must call :meth:`adjust` themselves.
+    ``flask dashboard rebuild`` recomputes everything from scratch.
+    """
+
+    __tablename__ = 'dashboard_counters'
+    __table_args__ = (
+        db.UniqueConstraint('metric', 'bucket', name='uq_dashboard_counters_metric_bucket'),
+    )
+
+    metric = db.Column(db.String(40), nullable=False)
+    bucket = db.Column(db.String(40), nullable=False, default='')
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def values(cls, metric):
+        """Non-zero counts of ``metric`` by bucket."""
+        rows = db.session.execute(
+            select(cls.bucket, cls.value)
+            .where(cls.metric == metric, cls.value != 0))
+        return dict(rows.all())
+
+    @classmethod
+    def total(cls, metric, first=None, last=None):
+        """Sum of ``metric`` over the buckets from ``first`` to ``last``."""
+        stmt = select(func.coalesce(func.sum(cls.value), 0)).where(cls.metric == metric)
+        if first is not None:
+            stmt = stmt.where(cls.bucket >= first)
+        if last is not None:
+            stmt = stmt.where(cls.bucket <= last)
+        return db.session.execute(stmt).scalar()
+
+    @classmethod
+    def adjust(cls, deltas, session=None):
+        """Add ``deltas`` (a mapping of ``(metric, bucket)`` to an amount)."""
+        session = session or db.session
+        now = datetime.utcnow()
+        # Sorted so concurrent transactions lock the rows in the same order.
+        rows = [{'metric': metric, 'bucket': bucket, 'value': delta,
+                 'created_at': now, 'updated_at': now}
+                for (metric, bucket), delta in sorted(deltas.items()) if delta]
+        if not rows:
+            return
+        table = cls.__table__
+        dialect = session.get_bind(mapper=cls.__mapper__).dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            module = sqlite if dialect == 'sqlite' else postgresql
+            stmt = module.insert(table).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.metric, table.c.bucket],
+                set_={'value': table.c.value + stmt.excluded.value,
+                      'updated_at': stmt.excluded.updated_at})
+            session.execute(stmt)
+            return
+        for row in rows:
+            result = session.execute(
+                update(table)
+                .where(table.c.metric == row['metric'], table.c.bucket == row['bucket'])
+                .values(value=table.c.value + row['value'], updated_at=now))
+            if not result.rowcount:
+                session.execute(insert(table).values(row))
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every counter from the vendor and document tables."""
+        table = cls.__table__
+        now = datetime.utcnow()
+        columns = ['metric', 'bucket', 'value', 'created_at', 'updated_at']
+
+        def counts(metric, bucket, source, where=None):
+            stmt = (select(literal(metric), bucket, func.count(), literal(now), literal(now))
+                    .select_from(source).group_by(bucket))
+            if where is not None:
+                stmt = stmt.where(where)
+            return insert(table).from_select(columns, stmt)
+
+        db.session.execute(delete(table))
+        db.session.execute(insert(table).from_select(columns, select(
+            literal('vendors'), literal(''), func.count(), literal(now), literal(now))
+            .select_from(Vendor.__table__)))
+        db.session.execute(counts('vendors.status', func.coalesce(Vendor.status, ''),
+                                  Vendor.__table__))
+        db.session.execute(counts(
+            'vendors.category', func.coalesce(cast(Vendor.category_id, db.String), ''),
+            Vendor.__table__))
+        db.session.execute(counts(
+            'documents.expiry', cast(VendorDocument.expiry_date, db.String),
+            VendorDocument.__table__, VendorDocument.expiry_date.isnot(None)))
+        db.session.commit()
+
+
+def _previous(obj, key):
+    """Value of ``key`` before the pending flush."""
+    history = get_history(obj, key)
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, key)
+
+
+def _buckets(obj, previous=False):
+    value = _previous if previous else getattr
+    if isinstance(obj, Vendor):
+        return vendor_buckets(value(obj, 'status'), value(obj, 'category_id'))
+    return document_buckets(value(obj, 'expiry_date'))
+
+
+@event.listens_for(db.session, 'after_flush')
+def count_flushed_changes(session, flush_context):
+    """Apply the flush's vendor and document changes to the counters."""
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, (Vendor, VendorDocument)):
+            deltas.update(_buckets(obj))
+    for obj in session.deleted:
+        if isinstance(obj, (Vendor, VendorDocument)):
+            deltas.subtract(_buckets(obj, previous=True))
+    for obj in session.dirty:
+        if isinstance(obj, (Vendor, VendorDocument)) and session.is_modified(obj):
+            deltas.subtract(_buckets(obj, previous=True))
+            deltas.update(_buckets(obj))
+    DashboardCounter.adjust(deltas, session)
@@ -0,0 +1,172 @@
+"""Blocking keys for duplicate-vendor detection.
+
+Every vendor gets a handful of keys derived from its normalized name, tax
+ID and address.  Vendors that share a key are candidate duplicates, so
+candidates come from an indexed equi-join instead of comparing all pairs.
+"""
+import re
+import unicodedata
+from sqlalchemy import event, inspect, select, delete, insert
+from .base import db
+from .vendor import Vendor
+
+# Derived index table: maintained by the flush hook below and the bulk
+# paths, and rebuilt by `flask vendors duplicates --rebuild-index`.  No
+# foreign key, so keys can be removed after the vendor row.
+vendor_blocking_keys = db.Table(
+    'vendor_blocking_keys',
+    db.Column('key', db.String(80), primary_key=True),
+    db.Column('vendor_id', db.Integer, primary_key=True),
+    db.Index('ix_vendor_blocking_keys_vendor_id', 'vendor_id'),
+)
+
+KEYED_FIELDS = ('name', 'legal_name', 'tax_id', 'address_line1', 'postal_code')
+
+LEGAL_SUFFIXES = frozenset((
+    'inc', 'incorporated', 'llc', 'llp', 'lp', 'ltd', 'limited', 'co', 'corp',
+    'corporation', 'company', 'plc', 'pc', 'pllc', 'gmbh', 'sa', 'the',
+))
+
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'road': 'rd', 'boulevard': 'blvd',
+    'drive': 'dr', 'lane': 'ln', 'court': 'ct', 'place': 'pl', 'suite': 'ste',
+    'highway': 'hwy', 'parkway': 'pkwy', 'north': 'n', 'south': 's',
+    'east': 'e', 'west': 'w', 'apartment': 'apt', 'floor': 'fl',
+}
+
+
+WORD = re.compile(r'[a-z0-9]+')
+
+
+def _words(text):
+    if not text:
+        return []
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return WORD.findall(text.casefold().replace('&', ' and '))
+
+
+def normalize_name(name):
+    """``'Acme, Inc.'`` and ``'ACME Inc'`` both become ``'acme'``."""
+    words = [word for word in _words(name) if word not in LEGAL_SUFFIXES]
+    return ' '.join(words)
+
+
+def normalize_tax_id(tax_id):
+    return re.sub(r'[^0-9A-Z]', '', (tax_id or '').upper())
+
+
+def normalize_address(address_line1, postal_code=None):
+    words = [ADDRESS_ABBREVIATIONS.get(word, word) for word in _words(address_line1)]
+    postal = re.sub(r'[^0-9A-Z]', '', (postal_code or '').upper())[:5]
+    return ' '.join(words), postal
+
+
+def soundex(word):
+    """American Soundex code of ``word`` (``''`` for no letters)."""
+    codes = {**dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'),
+             **dict.fromkeys('dt', '3'), 'l': '4', **dict.fromkeys('mn', '5'), 'r': '6'}
+    letters = [char for char in word.lower() if char.isalpha()]
+    if not letters:
+        return ''
+    result, previous = letters[0].upper(), codes.get(letters[0], '')
+    for char in letters[1:]:
+        code = codes.get(char, '')
+        if code and code != previous:
+            result += code
+        if char not in 'hw':
+            previous = code
+    return (result + '000')[:4]
+
+
+def blocking_keys(name, legal_name=None, tax_id=None, address_line1=None,
+                  postal_code=None):
+    """Blocking keys of a vendor with these field values."""
+    keys = set()
+    tax = normalize_tax_id(tax_id)
+    if len(tax) >= 4:
+        keys.add(f'tax:{tax}')
+    for value in (name, legal_name):
+        normalized = normalize_name(value)
+        if not normalized:
+            continue
+        tokens = normalized.split()
+        compact = normalized.replace(' ', '')
+        keys.add(f'nm:{compact}'[:80])
+        keys.add(f'tk:{"".join(sorted(tokens))}'[:80])
+        # Phonetic key of the first two words catches misspellings; the
+        # leading and trailing 4-grams catch a typo at either end.
+        keys.add('ph:' + ''.join(soundex(token) for token in tokens[:2]))
+        if len(compact) >= 6:
+            keys.add(f'pre:{compact[:4]}{len(compact) // 4}')
+            keys.add(f'suf:{compact[-4:]}{len(compact) // 4}')
+    street, postal = normalize_address(address_line1, postal_code)
+    if street and postal:
+        keys.add(f'ad:{postal}:{street}'[:80])
+    return keys
+
+
+def keys_for(vendor):
+    return blocking_keys(*(getattr(vendor, field) for field in KEYED_FIELDS))
+
+
+def _replace_keys(session, keys_by_vendor, removed=()):
+    ids = list(keys_by_vendor) + list(removed)
+    if not ids:
+        return
+    session.execute(delete(vendor_blocking_keys)
+                    .where(vendor_blocking_keys.c.vendor_id.in_(ids)))
+    rows = [{'key': key, 'vendor_id': vendor_id}
+            for vendor_id, keys in keys_by_vendor.items() for key in keys]
+    if rows:
+        session.execute(insert(vendor_blocking_keys), rows)
+
+
+def refresh_blocking_keys(vendor_ids, session=None):
+    """Recompute the keys of ``vendor_ids`` from the stored rows.
+
+    For bulk statements that bypass the flush hook; vendors that no longer
+    exist lose their keys.
+    """
+    session = session or db.session
+    vendor_ids = list(vendor_ids)
+    rows = session.execute(
+        select(Vendor.id, *(getattr(Vendor, field) for field in KEYED_FIELDS))
+        .where(Vendor.id.in_(vendor_ids))).all()
+    keys_by_vendor = {row[0]: blocking_keys(*row[1:]) for row in rows}
+    _replace_keys(session, keys_by_vendor, set(vendor_ids) - set(keys_by_vendor))
+
+
+def rebuild_blocking_keys(batch_size=1000):
+    """Recompute the keys of every vendor; returns the number of vendors."""
+    db.session.execute(delete(vendor_blocking_keys))
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Vendor.id, *(getattr(Vendor, field) for field in KEYED_FIELDS))
+            .where(Vendor.id > last_id).order_by(Vendor.id).limit(batch_size)).all()
+        if not rows:
+            break
+        keys = [{'key': key, 'vendor_id': row[0]}
+                for row in rows for key in blocking_keys(*row[1:])]
+        if keys:
+            db.session.execute(insert(vendor_blocking_keys), keys)
+        count += len(rows)
+        last_id = rows[-1][0]
+    db.session.commit()
+    return count
+
+
+@event.listens_for(db.session, 'after_flush')
+def maintain_blocking_keys(session, flush_context):
+    """Keep the blocking keys of flushed vendors current."""
+    changed = {}
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Vendor) and obj not in session.deleted:
+            if obj in session.new or any(
+                    inspect(obj).attrs[field].history.has_changes()
+                    for field in KEYED_FIELDS):
+                changed[obj.id] = keys_for(obj)
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Vendor)]
+    _replace_keys(session, changed, removed)
@@ -0,0 +1,39 @@
+"""Outbox model for asynchronously sent email."""
+from .base import BaseModel, db
+
+
+class OutboxMessage(BaseModel):
+    """An email waiting to be sent by the outbox worker.
+
+    Views only add rows (see ``app.jobs.mail.enqueue_mail``), committed with
+    the rest of their transaction; the worker claims, sends, retries and
+    eventually dead-letters them.
+    """
+
+    __tablename__ = 'outbox_messages'
+    __table_args__ = (
+        # The worker's queue scan: due pending messages, oldest first.
+        db.Index('ix_outbox_messages_status_next_attempt_at', 'status', 'next_attempt_at', 'id'),
+    )
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    sender = db.Column(db.String(255))
+    recipients = db.Column(db.Text, nullable=False)  # comma separated
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False)
+    claim_token = db.Column(db.String(32), index=True)
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+
+    @property
+    def recipient_list(self):
+        return [address.strip() for address in self.recipients.split(',') if address.strip()]
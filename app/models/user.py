@@ -1,6 +1,8 @@
 """User and role models for authentication and authorization."""
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event, inspect
+from ..utils.passwords import password_hasher
 from .base import BaseModel, db
 
 # Association table for user roles
@@ -64,6 +66,13 @@ class User(UserMixin, BaseModel):
     is_active = db.Column(db.Boolean, default=True)
     last_login = db.Column(db.DateTime)
 
+    # Effective authorization denormalized from ``roles`` so permission checks
+    # are a bit test on the already-loaded row.  Kept current by the flush
+    # hook below; ``authz_version`` is bumped whenever either value changes.
+    permission_mask = db.Column(db.Integer, default=0, nullable=False)
+    role_names = db.Column(db.String(512), default='', nullable=False)
+    authz_version = db.Column(db.Integer, default=0, nullable=False)
+
     roles = db.relationship('Role', secondary=user_roles, back_populates='users')
 
     @property
@@ -73,20 +82,42 @@ class User(UserMixin, BaseModel):
 
     @password.setter
     def password(self, password):
-        """Set password to a hashed password."""
-        self.password_hash = generate_password_hash(password)
+        """Set password to a hashed password, with ``PASSWORD_HASH_METHOD``."""
+        self.password_hash = generate_password_hash(
+            password, method=password_hasher.method or 'scrypt')
 
     def verify_password(self, password):
         """Check if password matches the hashed password."""
         return check_password_hash(self.password_hash, password)
 
+    def refresh_authorization(self, exclude=()):
+        """Recompute the cached permission mask and role names from ``roles``.
+
+        Roles in ``exclude`` (e.g. roles being deleted) are ignored.
+        """
+        roles = [role for role in self.roles if role not in exclude]
+        mask = 0
+        for role in roles:
+            # Unflushed roles have not received the column default yet.
+            mask |= role.permissions if role.permissions is not None else Permission.VIEW
+        names = ','.join(sorted(role.name for role in roles))
+        if mask != self.permission_mask or names != self.role_names:
+            self.permission_mask = mask
+            self.role_names = names
+            self.authz_version = (self.authz_version or 0) + 1
+
+    @property
+    def role_set(self):
+        """Names of the user's roles."""
+        return frozenset(filter(None, (self.role_names or '').split(',')))
+
     def has_permission(self, permission):
         """Check if user has a specific permission."""
-        return any(role.permissions & permission for role in self.roles)
+        return bool((self.permission_mask or 0) & permission)
 
     def has_role(self, role_name):
         """Check if user has a specific role."""
-        return any(role.name == role_name for role in self.roles)
+        return role_name in self.role_set
 
     @property
     def is_admin(self):
@@ -96,4 +127,27 @@ class User(UserMixin, BaseModel):
     @property
     def full_name(self):
         """Get user's full name."""
-        return f"{self.first_name} {self.last_name}" if self.first_name and self.last_name else self.username
\ No newline at end of file
+        return f"{self.first_name} {self.last_name}" if self.first_name and self.last_name else self.username
+
+@event.listens_for(db.session, 'before_flush')
+def refresh_user_authorization(session, flush_context, instances):
+    """Keep the users' cached authorization in step with role changes."""
+    users = set()
+    deleted_roles = {obj for obj in session.deleted if isinstance(obj, Role)}
+    for obj in list(session.new) + list(session.dirty):
+        state = inspect(obj)
+        if isinstance(obj, User):
+            if obj in session.new or state.attrs.roles.history.has_changes():
+                users.add(obj)
+        elif isinstance(obj, Role):
+            history = state.attrs.users.history
+            users.update(history.added)
+            users.update(history.deleted)
+            if (state.attrs.permissions.history.has_changes()
+                    or state.attrs.name.history.has_changes()):
+                users.update(obj.users)
+    for role in deleted_roles:
+        users.update(role.users)
+    for user in users:
+        if user not in session.deleted:
+            user.refresh_authorization(exclude=deleted_roles)
@@ -1,7 +1,32 @@
 """Vendor model module."""
+import re
 from .base import BaseModel, db
-from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+from sqlalchemy import select, func, event, DDL, table, column, literal_column
+
+# Lightweight handle on the SQLite FTS5 index; the table itself is created by
+# the DDL hooks at the bottom of this module (and by the migration), not by
+# the metadata.
+vendors_fts = table('vendors_fts', column('rowid'), column('vendors_fts'))
+
+# Text indexed for PostgreSQL full-text search.  Must stay identical to the
+# expression of the ``ix_vendors_search`` GIN index so the planner uses it.
+VENDOR_SEARCH_DOCUMENT = (
+    "to_tsvector('simple', coalesce(vendors.name, '') || ' ' || "
+    "coalesce(vendors.legal_name, '') || ' ' || coalesce(vendors.tax_id, ''))"
+)
+
+_SEARCH_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def _first_primary_contact_id():
+    """Lowest id of the primary contacts of the contact's vendor."""
+    other = aliased(VendorContact)
+    return (select(func.min(other.id))
+            .where(other.vendor_id == VendorContact.vendor_id,
+                   other.is_primary.is_(True))
+            .correlate(VendorContact)
+            .scalar_subquery())
 
 class VendorCategory(BaseModel):
     """Vendor category model."""
@@ -17,6 +42,13 @@ class VendorContact(BaseModel):
     """Vendor contact model for multiple contacts per vendor."""
     
     __tablename__ = 'vendor_contacts'
+    __bulk_writes__ = False
+    __table_args__ = (
+        # Contacts of a vendor, and the primary contact lookup.
+        db.Index('ix_vendor_contacts_vendor_id_is_primary', 'vendor_id', 'is_primary'),
+        # Change feed scan, in cursor order.
+        db.Index('ix_vendor_contacts_updated_at_id', 'updated_at', 'id'),
+    )
 
     vendor_id = db.Column(db.Integer, db.ForeignKey('vendors.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -27,17 +59,47 @@ class VendorContact(BaseModel):
 
     vendor = db.relationship('Vendor', back_populates='contacts')
 
+    def to_dict(self):
+        """Serialize the contact for JSON responses."""
+        return {
+            'id': self.id,
+            'vendor_id': self.vendor_id,
+            'name': self.name,
+            'title': self.title,
+            'email': self.email,
+            'phone': self.phone,
+            'is_primary': bool(self.is_primary),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
 class Vendor(BaseModel):
     """Vendor model."""
     
     __tablename__ = 'vendors'
+    __bulk_writes__ = False
+    __table_args__ = (
+        # Sort key of the vendor listing; serves keyset pagination seeks.
+        db.Index('ix_vendors_name_id', 'name', 'id'),
+        # Listing filtered by status or category, still ordered by name.
+        db.Index('ix_vendors_status_name_id', 'status', 'name', 'id'),
+        db.Index('ix_vendors_category_id_name_id', 'category_id', 'name', 'id'),
+        # Change feed scan, in cursor order.
+        db.Index('ix_vendors_updated_at_id', 'updated_at', 'id'),
+    )
+
+    STATUSES = ('active', 'inactive')
 
     name = db.Column(db.String(255), nullable=False)
     legal_name = db.Column(db.String(255))
     tax_id = db.Column(db.String(50))
     website = db.Column(db.String(255))
-    status = db.Column(db.String(20), default='active')
-    category_id = db.Column(db.Integer, db.ForeignKey('vendor_categories.id'))
+
+    # active_history: the dashboard counters need the previous value even
+    # when the attribute is set on an expired instance.
+    status = db.column_property(db.Column(db.String(20), default='active'),
+                                active_history=True)
+    category_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('vendor_categories.id')), active_history=True)
     
     # Address fields
     address_line1 = db.Column(db.String(255))
@@ -59,13 +121,18 @@ class Vendor(BaseModel):
                              cascade='all, delete-orphan')
     documents = db.relationship('VendorDocument', back_populates='vendor',
                               cascade='all, delete-orphan')
-    
-    @hybrid_property
-    def primary_contact(self):
-        """Get the primary contact for the vendor."""
-        return next((contact for contact in self.contacts if contact.is_primary), None)
+    # The primary contact, selected in SQL rather than by scanning
+    # ``contacts``, so listings can eager load it for a whole page with
+    # ``selectinload(Vendor.primary_contact)``.  Imported data may flag
+    # several contacts as primary; the one with the lowest id wins.
+    # Read-only: add or edit contacts through ``contacts``.
+    primary_contact = db.relationship(
+        'VendorContact', uselist=False, viewonly=True,
+        primaryjoin=lambda: db.and_(
+            Vendor.id == VendorContact.vendor_id,
+            VendorContact.id == _first_primary_contact_id()))
 
-    @hybrid_property
+    @property
     def full_address(self):
         """Get the full address as a formatted string."""
         parts = [self.address_line1]
@@ -76,21 +143,100 @@ class Vendor(BaseModel):
             parts.append(self.country)
         return ', '.join(filter(None, parts))
 
+    def to_dict(self):
+        """Serialize the vendor's listing fields for JSON responses."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'legal_name': self.legal_name,
+            'tax_id': self.tax_id,
+            'website': self.website,
+            'status': self.status,
+            'category_id': self.category_id,
+            'city': self.city,
+            'state': self.state,
+            'country': self.country,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    @staticmethod
+    def search_terms(query):
+        """Split a search box string into lower-cased word prefixes."""
+        return _SEARCH_TOKEN.findall(query.lower())[:8]
+
+    @classmethod
+    def search_ids(cls, query):
+        """Return a SELECT of the IDs of vendors matching ``query``.
+
+        Uses the full-text index, so it can be combined with other filters
+        (``Vendor.id.in_(Vendor.search_ids(q))``) without a table scan.
+        """
+        terms = cls.search_terms(query)
+        if not terms:
+            return select(cls.id).where(db.false())
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            return select(vendors_fts.c.rowid).where(cls._fts_match(terms))
+        if dialect == 'postgresql':
+            return select(cls.id).where(cls._tsquery_match(terms))
+        return select(cls.id).where(cls._ilike_match(query))
+
     @classmethod
     def search(cls, query):
-        """Search vendors by name, legal name, or tax ID."""
-        return cls.query.filter(
-            db.or_(
-                cls.name.ilike(f'%{query}%'),
-                cls.legal_name.ilike(f'%{query}%'),
-                cls.tax_id.ilike(f'%{query}%')
-            )
+        """Search vendors by name, legal name, or tax ID, best matches first."""
+        terms = cls.search_terms(query)
+        if not terms:
+            return cls.query.filter(db.false())
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            # bm25() weights: name, legal_name, tax_id (lower is better).
+            rank = func.bm25(literal_column('vendors_fts'), 10.0, 5.0, 1.0)
+            return (cls.query
+                    .join(vendors_fts, vendors_fts.c.rowid == cls.id)
+                    .filter(cls._fts_match(terms))
+                    .order_by(rank, cls.name))
+        if dialect == 'postgresql':
+            tsquery = func.to_tsquery('simple', cls._tsquery_text(terms))
+            rank = func.ts_rank(literal_column(VENDOR_SEARCH_DOCUMENT), tsquery)
+            return (cls.query
+                    .filter(cls._tsquery_match(terms))
+                    .order_by(rank.desc(), cls.name))
+        return cls.query.filter(cls._ilike_match(query)).order_by(cls.name)
+
+    @staticmethod
+    def _fts_match(terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return vendors_fts.c.vendors_fts.op('MATCH')(match)
+
+    @staticmethod
+    def _tsquery_text(terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    @classmethod
+    def _tsquery_match(cls, terms):
+        tsquery = func.to_tsquery('simple', cls._tsquery_text(terms))
+        return literal_column(VENDOR_SEARCH_DOCUMENT).op('@@')(tsquery)
+
+    @classmethod
+    def _ilike_match(cls, query):
+        return db.or_(
+            cls.name.ilike(f'%{query}%'),
+            cls.legal_name.ilike(f'%{query}%'),
+            cls.tax_id.ilike(f'%{query}%')
         )
 
 class VendorDocument(BaseModel):
     """Vendor document model for storing document metadata."""
     
     __tablename__ = 'vendor_documents'
+    __bulk_writes__ = False
+    __table_args__ = (
+        db.Index('ix_vendor_documents_vendor_id', 'vendor_id'),
+        # Range scans over upcoming expiry dates, in keyset order.
+        db.Index('ix_vendor_documents_expiry_date_id', 'expiry_date', 'id'),
+        # Change feed scan, in cursor order.
+        db.Index('ix_vendor_documents_updated_at_id', 'updated_at', 'id'),
+    )
 
     vendor_id = db.Column(db.Integer, db.ForeignKey('vendors.id'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
@@ -99,7 +245,76 @@ class VendorDocument(BaseModel):
     mime_type = db.Column(db.String(100))
     size = db.Column(db.Integer)  # in bytes
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    expiry_date = db.Column(db.Date)
+    expiry_date = db.column_property(db.Column(db.Date), active_history=True)
 
     vendor = db.relationship('Vendor', back_populates='documents')
-    uploader = db.relationship('User')
\ No newline at end of file
+    uploader = db.relationship('User')
+    notices = db.relationship('VendorDocumentNotice', back_populates='document',
+                              cascade='all, delete-orphan')
+
+    def to_dict(self):
+        """Serialize the document's metadata for JSON responses."""
+        return {
+            'id': self.id,
+            'vendor_id': self.vendor_id,
+            'name': self.name,
+            'document_type': self.document_type,
+            'mime_type': self.mime_type,
+            'size': self.size,
+            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+class VendorDocumentNotice(BaseModel):
+    """Record of an expiry notification sent for a document.
+
+    Keyed by the expiry date notified about, so a renewed document with a new
+    expiry date is notified again.
+    """
+
+    __tablename__ = 'vendor_document_notices'
+    __table_args__ = (
+        db.UniqueConstraint('document_id', 'expiry_date',
+                            name='uq_vendor_document_notices_document_id_expiry_date'),
+    )
+
+    document_id = db.Column(db.Integer, db.ForeignKey('vendor_documents.id'), nullable=False)
+    expiry_date = db.Column(db.Date, nullable=False)
+    kind = db.Column(db.String(20), nullable=False, default='expiry')
+
+    document = db.relationship('VendorDocument', back_populates='notices')
+
+# Search index DDL, run whenever the vendors table is created outside of
+# Alembic (``db.create_all()`` in tests and fresh dev databases).
+_SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS vendors_fts USING fts5("
+    "name, legal_name, tax_id, content='vendors', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS vendors_fts_ai AFTER INSERT ON vendors BEGIN "
+    "INSERT INTO vendors_fts(rowid, name, legal_name, tax_id) "
+    "VALUES (new.id, new.name, new.legal_name, new.tax_id); END",
+    "CREATE TRIGGER IF NOT EXISTS vendors_fts_ad AFTER DELETE ON vendors BEGIN "
+    "INSERT INTO vendors_fts(vendors_fts, rowid, name, legal_name, tax_id) "
+    "VALUES ('delete', old.id, old.name, old.legal_name, old.tax_id); END",
+    "CREATE TRIGGER IF NOT EXISTS vendors_fts_au "
+    "AFTER UPDATE OF name, legal_name, tax_id ON vendors BEGIN "
+    "INSERT INTO vendors_fts(vendors_fts, rowid, name, legal_name, tax_id) "
+    "VALUES ('delete', old.id, old.name, old.legal_name, old.tax_id); "
+    "INSERT INTO vendors_fts(rowid, name, legal_name, tax_id) "
+    "VALUES (new.id, new.name, new.legal_name, new.tax_id); END",
+)
+
+_POSTGRESQL_SEARCH_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_vendors_search ON vendors USING gin ("
+    "to_tsvector('simple', coalesce(name, '') || ' ' || "
+    "coalesce(legal_name, '') || ' ' || coalesce(tax_id, '')))",
+)
+
+for _statement in _SQLITE_SEARCH_DDL:
+    event.listen(Vendor.__table__, 'after_create',
+                 DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in _POSTGRESQL_SEARCH_DDL:
+    event.listen(Vendor.__table__, 'after_create',
+                 DDL(_statement).execute_if(dialect='postgresql'))
+event.listen(Vendor.__table__, 'after_drop',
+             DDL('DROP TABLE IF EXISTS vendors_fts').execute_if(dialect='sqlite'))
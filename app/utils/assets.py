@@ -0,0 +1,279 @@
+"""Static asset pipeline: vendoring, fingerprinting and precompression.
+
+``flask assets build`` downloads the third-party files listed in
+``VENDOR_ASSETS`` into the static folder, then writes a copy of every
+static file under ``static/dist`` with a content hash in its name
+(minifying CSS that is not minified yet), ``.gz`` and ``.br`` variants of
+the compressible ones, and ``dist/manifest.json`` mapping each original
+path to its fingerprinted copy.
+
+At runtime ``url_for('static', filename=...)`` follows the manifest, and
+fingerprinted files are served with a far-future ``Cache-Control`` and
+the best precompressed variant the client accepts.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from urllib.parse import urljoin, urlsplit
+from urllib.request import urlopen
+from flask import current_app, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = frozenset(('.css', '.js', '.map', '.svg', '.json', '.txt', '.ttf', '.eot'))
+# Preferred first.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+_CSS_TOKENS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/)''', re.S)
+
+
+def _local_reference(ref):
+    """The path part of a relative ``url()`` reference, or ``None``."""
+    if ref.startswith(('data:', '#', '/')) or urlsplit(ref).scheme:
+        return None
+    return urlsplit(ref).path or None
+
+
+def css_references(text):
+    """Relative file references in the ``url()``\\s of a stylesheet."""
+    for match in _CSS_URL.finditer(text):
+        path = _local_reference(match.group(2))
+        if path:
+            yield path
+
+
+def minify_css(text):
+    """Strip comments and insignificant whitespace; strings are kept as is.
+
+    ``/*! ... */`` comments (licence headers) are preserved.
+    """
+    parts = []
+    for index, part in enumerate(_CSS_TOKENS.split(text)):
+        if index % 2:
+            if not part.startswith('/*') or part.startswith('/*!'):
+                parts.append(part)
+            continue
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        part = re.sub(r':\s+', ':', part)
+        parts.append(part.replace(';}', '}'))
+    return ''.join(parts).strip()
+
+
+def _download(url, timeout):
+    with urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def vendor_assets(static_folder, sources, refresh=False, timeout=30):
+    """Download ``sources`` (static path: URL) into ``static_folder``.
+
+    Files referenced by downloaded stylesheets (fonts, images) are fetched
+    too.  Files already present are only downloaded again with
+    ``refresh``, and a failed download keeps the existing copy.  Returns
+    ``(fetched, kept, failed)`` lists of ``(path, url)``; ``failed``
+    entries carry the error instead of the URL.
+    """
+    fetched, kept, failed = [], [], []
+    queue = list(sources.items())
+    seen = set()
+    while queue:
+        path, url = queue.pop(0)
+        if path in seen:
+            continue
+        seen.add(path)
+        target = os.path.join(static_folder, *path.split('/'))
+        if refresh or not os.path.isfile(target):
+            try:
+                data = _download(url, timeout)
+            except OSError as e:
+                if os.path.isfile(target):
+                    kept.append((path, url))
+                else:
+                    failed.append((path, e))
+                    continue
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(data)
+                fetched.append((path, url))
+        else:
+            kept.append((path, url))
+        if path.endswith('.css'):
+            with open(target, encoding='utf-8') as f:
+                text = f.read()
+            for ref in css_references(text):
+                ref_path = posixpath.normpath(posixpath.join(posixpath.dirname(path), ref))
+                if ref_path.startswith('..'):
+                    continue  # outside the static folder
+                queue.append((ref_path, urljoin(url, ref)))
+    return fetched, kept, failed
+
+
+def _fingerprinted(path, data):
+    stem, ext = posixpath.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def _rewrite_css(text, path, manifest):
+    """Point ``url()`` references at the fingerprinted copies."""
+    def replace(match):
+        quote, ref = match.groups()
+        ref_path = _local_reference(ref)
+        if not ref_path:
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(path), ref_path))
+        if target not in manifest:
+            return match.group(0)
+        # dist mirrors the static tree, so only the file name changes.
+        new_ref = posixpath.join(posixpath.dirname(ref_path),
+                                 posixpath.basename(manifest[target]))
+        suffix = ref[len(ref_path):]  # query string or fragment
+        return f'url({quote}{new_ref}{suffix}{quote})'
+    return _CSS_URL.sub(replace, text)
+
+
+def compressors():
+    """Compress functions by file suffix; ``.br`` needs the brotli package."""
+    functions = {'.gz': lambda data: gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        functions['.br'] = lambda data: brotli.compress(data, quality=11)
+    return functions
+
+
+class BuildResult:
+    """Summary of :func:`build_assets`."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.compressed = {}
+        self.manifest = {}
+
+    def __str__(self):
+        variants = ', '.join(f'{suffix} {size / 1024:.0f} KiB'
+                             for suffix, size in sorted(self.compressed.items()))
+        return (f'{self.files} files, {self.bytes / 1024:.0f} KiB'
+                + (f' ({variants})' if variants else ''))
+
+
+def build_assets(static_folder, clean=False):
+    """Write fingerprinted, minified and precompressed copies to ``dist``.
+
+    Earlier builds are kept unless ``clean`` is set, so pages rendered by
+    workers still running the previous release keep working.
+    """
+    dist = os.path.join(static_folder, DIST)
+    if clean and os.path.isdir(dist):
+        shutil.rmtree(dist)
+    encoders = compressors()
+    paths = []
+    for root, dirs, files in os.walk(static_folder):
+        relative = os.path.relpath(root, static_folder).replace(os.sep, '/')
+        if relative == DIST:
+            dirs[:] = []
+            continue
+        dirs[:] = [name for name in dirs if not name.startswith('.')]
+        for name in files:
+            if not name.startswith('.'):
+                paths.append(posixpath.normpath(posixpath.join(relative, name)))
+    # Stylesheets last, so the files they reference are fingerprinted first.
+    paths.sort(key=lambda path: (path.endswith('.css'), path))
+
+    result = BuildResult()
+    for path in paths:
+        with open(os.path.join(static_folder, *path.split('/')), 'rb') as f:
+            data = f.read()
+        if path.endswith('.css'):
+            text = _rewrite_css(data.decode('utf-8'), path, result.manifest)
+            if not path.endswith('.min.css'):
+                text = minify_css(text)
+            data = text.encode('utf-8')
+        hashed = _fingerprinted(path, data)
+        target = os.path.join(dist, *hashed.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        result.files += 1
+        result.bytes += len(data)
+        if posixpath.splitext(path)[1] in COMPRESSIBLE:
+            for suffix, compress in encoders.items():
+                compressed = compress(data)
+                if len(compressed) < len(data) * 0.9:
+                    with open(target + suffix, 'wb') as f:
+                        f.write(compressed)
+                    result.compressed[suffix] = result.compressed.get(suffix, 0) + len(compressed)
+        result.manifest[path] = f'{DIST}/{hashed}'
+    with open(os.path.join(dist, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(result.manifest, f, indent=1, sort_keys=True)
+    return result
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(filename):
+    """URL of a static file; vendored files not downloaded yet load from their CDN."""
+    if filename not in current_app.extensions['assets']:
+        source = current_app.config.get('VENDOR_ASSETS', {}).get(filename)
+        if source and not os.path.isfile(
+                os.path.join(current_app.static_folder, *filename.split('/'))):
+            return source
+    return url_for('static', filename=filename)
+
+
+def _fingerprint_static_urls(endpoint, values):
+    if endpoint == 'static':
+        hashed = current_app.extensions['assets'].get(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+
+
+def send_static(filename):
+    """The static route, serving fingerprinted files precompressed and cached."""
+    if not filename.startswith(DIST + '/'):
+        return current_app.send_static_file(filename)
+    folder = current_app.static_folder
+    max_age = current_app.config['ASSETS_MAX_AGE']
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ENCODINGS:
+        variant = safe_join(folder, filename + suffix)
+        if request.accept_encodings[encoding] and variant and os.path.isfile(variant):
+            response = send_from_directory(folder, filename + suffix,
+                                           mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(folder, filename, mimetype=mimetype,
+                                       max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    """Serve static files through the manifest when ``ASSETS_USE_MANIFEST`` is set."""
+    manifest = load_manifest(app.static_folder) if app.config.get('ASSETS_USE_MANIFEST') else {}
+    app.extensions['assets'] = manifest
+    app.jinja_env.globals['asset_url'] = asset_url
+    if manifest:
+        app.url_defaults(_fingerprint_static_urls)
+    if app.has_static_folder:
+        app.view_functions['static'] = send_static
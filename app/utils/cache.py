@@ -0,0 +1,125 @@
+"""In-process caches and optional shared cache backends."""
+import json
+import time
+from collections import OrderedDict
+from threading import RLock
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry time-to-live.
+
+    ``ttl`` of ``None`` keeps entries until they are evicted by size.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._data), 'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalBackend:
+    """In-process stand-in for a shared cache backend.
+
+    Implements the same string key/value interface as :class:`RedisBackend`,
+    so code paths using a shared backend can run in development and tests.
+    """
+
+    def __init__(self):
+        self._cache = LRUCache(maxsize=100000)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._cache.set(key, value, ttl)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+
+class RedisBackend:
+    """Shared cache backend on Redis (requires the ``redis`` package)."""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError(
+                'The redis package is required for a redis:// cache URL') from exc
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._client.get(key)
+        return value.decode() if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, value, ex=ttl)
+
+    def delete(self, key):
+        self._client.delete(key)
+
+
+def make_backend(url):
+    """Create a shared cache backend from a URL, or ``None`` if unset.
+
+    ``local://`` selects the in-process stand-in.
+    """
+    if not url:
+        return None
+    if url.startswith('local://'):
+        return LocalBackend()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+    raise ValueError(f'Unsupported cache backend URL: {url}')
+
+
+def dumps(value):
+    """Serialize a value for a shared backend."""
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+def loads(value):
+    """Deserialize a value stored by :func:`dumps`."""
+    return json.loads(value)
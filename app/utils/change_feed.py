@@ -0,0 +1,135 @@
+"""Incremental change feed over vendors, contacts and documents.
+
+A consumer keeps the opaque cursor of the last change it applied and asks
+for the changes after it: rows whose ``(updated_at, id)`` is greater,
+read from the table's ``(updated_at, id)`` index, merged with the
+tombstones of rows deleted since.  A sync therefore costs time in
+proportion to the number of changes, not to the size of the table.  A
+missing cursor starts from the beginning, so the first call pages
+through a full snapshot.
+
+``updated_at`` is stamped when a change is flushed, not when it commits.
+Changes newer than ``CHANGE_FEED_LAG_SECONDS`` are held back so that a
+transaction still in flight cannot commit a change behind a cursor that
+has already moved past it.
+"""
+import heapq
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, tuple_
+from ..extensions import db
+from ..models.changes import FEED_MODELS, Tombstone, TombstoneWatermark
+from .pagination import encode_cursor, decode_cursor
+
+ENTITIES = tuple(FEED_MODELS)
+
+
+class CursorError(ValueError):
+    """The cursor is malformed."""
+
+
+class CursorExpired(CursorError):
+    """Tombstones after the cursor have been pruned; resync from scratch."""
+
+
+class ChangePage:
+    """Changes returned by :func:`read_changes`."""
+
+    def __init__(self, entity, items, next_cursor, has_more):
+        self.entity = entity
+        self.items = items
+        self.next_cursor = next_cursor
+        self.has_more = has_more
+
+    def to_dict(self):
+        return {'entity': self.entity, 'items': self.items,
+                'next_cursor': self.next_cursor, 'has_more': self.has_more}
+
+
+def _position(entity, cursor):
+    if not cursor:
+        return None
+    decoded = decode_cursor(cursor)
+    if decoded is None:
+        raise CursorError('Invalid cursor')
+    values, _ = decoded
+    if (len(values) != 2 or not isinstance(values[0], datetime)
+            or not isinstance(values[1], int) or isinstance(values[1], bool)):
+        raise CursorError('Invalid cursor')
+    pruned_through = db.session.scalar(
+        select(TombstoneWatermark.pruned_through)
+        .where(TombstoneWatermark.entity == entity))
+    if pruned_through is not None and values[0] <= pruned_through:
+        raise CursorExpired('Deletions after this cursor have been pruned')
+    return tuple(values)
+
+
+def read_changes(entity, cursor=None, limit=500, lag_seconds=5):
+    """Up to ``limit`` changes to ``entity`` after ``cursor``, oldest first.
+
+    Each item is ``{'op': 'upsert', 'id', 'updated_at', 'data'}`` with the
+    row's ``to_dict()``, or ``{'op': 'delete', 'id', 'updated_at'}``.  When
+    there are no new changes ``next_cursor`` is the cursor passed in.
+    Raises :class:`CursorError` for a malformed cursor and
+    :class:`CursorExpired` for one that tombstones have since been pruned
+    after; an old cursor on an entity without pruned deletions stays valid.
+    """
+    model = FEED_MODELS[entity]
+    position = _position(entity, cursor)
+    horizon = datetime.utcnow() - timedelta(seconds=lag_seconds)
+
+    rows = select(model).where(model.updated_at < horizon)
+    deletions = (select(Tombstone.updated_at, Tombstone.entity_id)
+                 .where(Tombstone.entity == entity, Tombstone.updated_at < horizon))
+    if position is not None:
+        rows = rows.where(tuple_(model.updated_at, model.id) > position)
+        deletions = deletions.where(
+            tuple_(Tombstone.updated_at, Tombstone.entity_id) > position)
+    rows = db.session.scalars(
+        rows.order_by(model.updated_at, model.id).limit(limit + 1)).all()
+    deletions = db.session.execute(
+        deletions.order_by(Tombstone.updated_at, Tombstone.entity_id)
+        .limit(limit + 1)).all()
+
+    changes = heapq.merge(
+        ((row.updated_at, row.id, row) for row in rows),
+        ((updated_at, entity_id, None) for updated_at, entity_id in deletions),
+        key=lambda change: change[:2])
+    items = []
+    has_more = False
+    for updated_at, id, row in changes:
+        if len(items) == limit:
+            has_more = True
+            break
+        item = {'op': 'upsert' if row is not None else 'delete',
+                'id': id, 'updated_at': updated_at.isoformat()}
+        if row is not None:
+            item['data'] = row.to_dict()
+        items.append(item)
+        position = (updated_at, id)
+    next_cursor = encode_cursor(position) if position is not None else None
+    return ChangePage(entity, items, next_cursor, has_more)
+
+
+def prune_tombstones(retention_days):
+    """Delete tombstones older than ``retention_days``; returns the count.
+
+    The newest deleted tombstone of each entity is recorded as its
+    watermark, so cursors from before it are refused from then on.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    newest = db.session.execute(
+        select(Tombstone.entity, func.max(Tombstone.updated_at))
+        .where(Tombstone.updated_at < cutoff)
+        .group_by(Tombstone.entity)).all()
+    watermarks = {watermark.entity: watermark for watermark in TombstoneWatermark.query
+                  .filter(TombstoneWatermark.entity.in_([entity for entity, _ in newest]))}
+    for entity, pruned_through in newest:
+        watermark = watermarks.get(entity)
+        if watermark is None:
+            db.session.add(TombstoneWatermark(entity=entity, pruned_through=pruned_through))
+        elif watermark.pruned_through < pruned_through:
+            watermark.pruned_through = pruned_through
+    count = (Tombstone.query.filter(Tombstone.updated_at < cutoff)
+             .delete(synchronize_session=False))
+    db.session.commit()
+    return count
@@ -0,0 +1,139 @@
+"""Duplicate-vendor detection over the blocking-key index.
+
+Candidate pairs are vendors sharing a blocking key (see
+``app.models.dedup``); keys shared by more than ``max_bucket`` vendors
+("acme", a common street) are skipped, which keeps the work near-linear
+in the number of vendors.  Each candidate pair is then scored on its
+normalized names, tax IDs and addresses.
+"""
+from collections import namedtuple
+from difflib import SequenceMatcher
+from sqlalchemy import select, func, and_
+from ..extensions import db
+from ..models import Vendor
+from ..models.dedup import (vendor_blocking_keys, blocking_keys, KEYED_FIELDS,
+                            normalize_name, normalize_tax_id, normalize_address)
+
+Profile = namedtuple('Profile', 'id name names tax street postal')
+DuplicatePair = namedtuple('DuplicatePair', 'first second score reasons')
+
+
+def make_profile(id, name, legal_name=None, tax_id=None, address_line1=None,
+                 postal_code=None):
+    """Normalized fields of a vendor, as compared by :func:`score`."""
+    names = {normalized for normalized in (normalize_name(name), normalize_name(legal_name))
+             if normalized}
+    street, postal = normalize_address(address_line1, postal_code)
+    return Profile(id, name, frozenset(names), normalize_tax_id(tax_id), street, postal)
+
+
+def _name_similarity(a, b, floor=0.0):
+    """Best of character and word overlap; ``0.0`` if it cannot reach ``floor``."""
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    overlap = len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+    matcher = SequenceMatcher(None, a, b)
+    # real_quick_ratio and quick_ratio are cheap upper bounds of ratio.
+    bound = max(floor, overlap)
+    if matcher.real_quick_ratio() <= bound or matcher.quick_ratio() <= bound:
+        return overlap
+    return max(matcher.ratio(), overlap)
+
+
+def score(a, b, threshold=0.0):
+    """Likelihood in [0, 1] that two profiles are the same vendor, with reasons.
+
+    Name similarity is only computed exactly when the pair could still
+    reach ``threshold``.
+    """
+    reasons = []
+    same_tax = bool(a.tax) and a.tax == b.tax
+    other_tax = bool(a.tax and b.tax) and not same_tax
+    same_address = bool(a.street) and a.street == b.street and a.postal == b.postal
+    floor = 0.0 if same_tax or same_address else threshold / (0.7 if other_tax else 1.0)
+    similarity = max((_name_similarity(x, y, floor) for x in a.names for y in b.names),
+                     default=0.0)
+    result = similarity
+    if similarity >= 0.6:
+        reasons.append(f'similar name ({similarity:.2f})')
+    if same_tax:
+        reasons.append('same tax ID')
+        result = max(result, 0.9)
+    elif other_tax:
+        result *= 0.7  # different tax IDs: probably distinct legal entities
+    if same_address:
+        reasons.append('same address')
+        result = min(1.0, max(result, 0.5 + 0.5 * similarity) + 0.05)
+    return round(result, 3), reasons
+
+
+def _profiles(ids):
+    rows = db.session.execute(
+        select(Vendor.id, *(getattr(Vendor, field) for field in KEYED_FIELDS))
+        .where(Vendor.id.in_(list(ids))))
+    return {row[0]: make_profile(*row) for row in rows}
+
+
+def candidate_pairs(max_bucket=50):
+    """Distinct ``(lower_id, higher_id)`` pairs sharing a usable blocking key."""
+    a = vendor_blocking_keys.alias('a')
+    b = vendor_blocking_keys.alias('b')
+    usable = (select(vendor_blocking_keys.c.key)
+              .group_by(vendor_blocking_keys.c.key)
+              .having(func.count().between(2, max_bucket)))
+    stmt = (select(a.c.vendor_id, b.c.vendor_id)
+            .join(b, and_(a.c.key == b.c.key, a.c.vendor_id < b.c.vendor_id))
+            .where(a.c.key.in_(usable))
+            .distinct()
+            .order_by(a.c.vendor_id, b.c.vendor_id))
+    return db.session.execute(stmt, execution_options={'yield_per': 5000})
+
+
+def find_duplicates(threshold=0.85, max_bucket=50, batch_size=5000):
+    """Yield :class:`DuplicatePair` for every candidate pair scoring ``threshold`` or more."""
+    profiles = {}
+    pairs = candidate_pairs(max_bucket)
+    while True:
+        batch = pairs.fetchmany(batch_size)
+        if not batch:
+            break
+        missing = {id for pair in batch for id in pair if id not in profiles}
+        if missing:
+            profiles.update(_profiles(missing))
+        for first_id, second_id in batch:
+            first, second = profiles.get(first_id), profiles.get(second_id)
+            if first is None or second is None:
+                continue
+            value, reasons = score(first, second, threshold)
+            if value >= threshold:
+                yield DuplicatePair(first, second, value, reasons)
+
+
+def possible_duplicates(fields, threshold=0.85, max_bucket=50, limit=5, exclude_id=None):
+    """Existing vendors that probably duplicate a vendor with ``fields``.
+
+    ``fields`` maps the keyed vendor fields (name, legal_name, tax_id,
+    address_line1, postal_code) to values.  Answered from the blocking-key
+    index: a few index range scans plus the candidates' rows.
+    """
+    keys = blocking_keys(*(fields.get(field) for field in KEYED_FIELDS))
+    if not keys:
+        return []
+    column = vendor_blocking_keys.c
+    usable = [key for key, count in db.session.execute(
+        select(column.key, func.count())
+        .where(column.key.in_(keys))
+        .group_by(column.key)) if count <= max_bucket]
+    if not usable:
+        return []
+    stmt = select(column.vendor_id).where(column.key.in_(usable)).distinct()
+    if exclude_id is not None:
+        stmt = stmt.where(column.vendor_id != exclude_id)
+    ids = db.session.execute(stmt.limit(max_bucket * 2)).scalars().all()
+    candidate = make_profile(None, *(fields.get(field) for field in KEYED_FIELDS))
+    matches = []
+    for profile in _profiles(ids).values():
+        value, reasons = score(candidate, profile, threshold)
+        if value >= threshold:
+            matches.append(DuplicatePair(candidate, profile, value, reasons))
+    matches.sort(key=lambda match: -match.score)
+    return matches[:limit]
@@ -0,0 +1,157 @@
+"""Identity cache backing the Flask-Login user loader."""
+from flask_login import UserMixin
+from sqlalchemy import event
+from ..extensions import db
+from .cache import LRUCache, make_backend, dumps, loads
+
+
+class UserSnapshot(UserMixin):
+    """Compact, detached copy of the fields needed to authorize a request.
+
+    Anything not in the snapshot falls through to the ``User`` row, which is
+    loaded on first such access.
+    """
+
+    FIELDS = ('id', 'email', 'username', 'first_name', 'last_name',
+              'is_active', 'permission_mask', 'role_names', 'authz_version')
+
+    def __init__(self, **fields):
+        self.__dict__['_model'] = None
+        for name in self.FIELDS:
+            self.__dict__[name] = fields.get(name)
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(**{name: getattr(user, name) for name in cls.FIELDS})
+
+    def to_dict(self):
+        return {name: self.__dict__[name] for name in self.FIELDS}
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def is_active(self):
+        return bool(self.__dict__['is_active'])
+
+    @property
+    def role_set(self):
+        """Names of the user's roles."""
+        return frozenset(filter(None, (self.role_names or '').split(',')))
+
+    def has_permission(self, permission):
+        """Check if user has a specific permission."""
+        return bool((self.permission_mask or 0) & permission)
+
+    def has_role(self, role_name):
+        """Check if user has a specific role."""
+        return role_name in self.role_set
+
+    @property
+    def is_admin(self):
+        """Check if user is an admin."""
+        return self.has_role('Admin')
+
+    @property
+    def full_name(self):
+        """Get user's full name."""
+        return f"{self.first_name} {self.last_name}" if self.first_name and self.last_name else self.username
+
+    def get_model(self):
+        """Return the ``User`` row this snapshot was taken from."""
+        if self._model is None:
+            from ..models import User
+            self.__dict__['_model'] = db.session.get(User, self.id)
+        return self._model
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.get_model(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get_model(), name, value)
+
+
+class IdentityCache:
+    """Two-tier cache of :class:`UserSnapshot` objects keyed by user ID.
+
+    The first tier is an in-process LRU.  When ``IDENTITY_CACHE_URL`` names
+    a shared backend, snapshots are also stored there so that other worker
+    processes can skip the database, and the local tier uses the shorter
+    ``IDENTITY_CACHE_LOCAL_TTL`` to bound how long a worker can serve an
+    identity invalidated by another process.
+    """
+
+    key_prefix = 'identity:'
+
+    def __init__(self):
+        self.local = LRUCache()
+        self.backend = None
+        self.ttl = 60
+
+    def init_app(self, app):
+        self.ttl = app.config.get('IDENTITY_CACHE_TTL', 60)
+        self.backend = make_backend(app.config.get('IDENTITY_CACHE_URL'))
+        local_ttl = (app.config.get('IDENTITY_CACHE_LOCAL_TTL', 5)
+                     if self.backend is not None else self.ttl)
+        self.local = LRUCache(maxsize=app.config.get('IDENTITY_CACHE_SIZE', 1024),
+                              ttl=local_ttl)
+        if not event.contains(db.session, 'after_flush', _collect_changed_users):
+            event.listen(db.session, 'after_flush', _collect_changed_users)
+            event.listen(db.session, 'after_commit', _evict_changed_users)
+            event.listen(db.session, 'after_soft_rollback', _forget_changed_users)
+
+    def get(self, user_id):
+        snapshot = self.local.get(user_id)
+        if snapshot is None and self.backend is not None:
+            raw = self.backend.get(f'{self.key_prefix}{user_id}')
+            if raw is not None:
+                snapshot = UserSnapshot(**loads(raw))
+                self.local.set(user_id, snapshot)
+        return snapshot
+
+    def set(self, snapshot):
+        self.local.set(snapshot.id, snapshot)
+        if self.backend is not None:
+            self.backend.set(f'{self.key_prefix}{snapshot.id}',
+                             dumps(snapshot.to_dict()), self.ttl)
+
+    def invalidate(self, user_id):
+        self.local.delete(user_id)
+        if self.backend is not None:
+            self.backend.delete(f'{self.key_prefix}{user_id}')
+
+    def load(self, user_id):
+        """Return the snapshot for ``user_id``, reading the row on a miss."""
+        snapshot = self.get(user_id)
+        if snapshot is None:
+            from ..models import User
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            snapshot = UserSnapshot.from_user(user)
+            self.set(snapshot)
+        # A fresh copy per request, so the lazily loaded row never leaks
+        # across sessions.
+        return UserSnapshot(**snapshot.to_dict())
+
+
+identity_cache = IdentityCache()
+
+
+def _collect_changed_users(session, flush_context):
+    from ..models import User
+    changed = session.info.setdefault('identity_cache_evict', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+def _evict_changed_users(session):
+    for user_id in session.info.pop('identity_cache_evict', ()):
+        identity_cache.invalidate(user_id)
+
+
+def _forget_changed_users(session, previous_transaction):
+    session.info.pop('identity_cache_evict', None)
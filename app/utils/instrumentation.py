@@ -0,0 +1,210 @@
+"""Lightweight per-request SQL and timing instrumentation.
+
+Records query count, database time, template render time and the slowest
+statement of every request, reports them in a ``Server-Timing`` header,
+logs slow requests and queries, and aggregates histograms that are served
+in the Prometheus text format at ``METRICS_PATH``.
+"""
+import bisect
+import hmac
+import time
+from threading import Lock
+from flask import (Response, abort, current_app, g, has_request_context,
+                   request, request_started, before_render_template,
+                   template_rendered)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, one series per label."""
+
+    def __init__(self, name, help, buckets, label=None):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.label = label
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value, label_value=None):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: str(item[0]))
+            for label_value, (counts, total, count) in series:
+                labels = f'{self.label}="{label_value}",' if self.label else ''
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += bucket_count
+                    lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+                braces = f'{{{labels.rstrip(",")}}}' if labels else ''
+                lines.append(f'{self.name}_sum{braces} {total}')
+                lines.append(f'{self.name}_count{braces} {count}')
+        return '\n'.join(lines)
+
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Request handling time.',
+    DURATION_BUCKETS, label='endpoint')
+db_duration = Histogram(
+    'db_time_per_request_seconds', 'Database time per request.',
+    DURATION_BUCKETS, label='endpoint')
+render_duration = Histogram(
+    'template_render_per_request_seconds', 'Template render time per request.',
+    DURATION_BUCKETS, label='endpoint')
+query_count = Histogram(
+    'db_queries_per_request', 'SQL statements per request.',
+    COUNT_BUCKETS, label='endpoint')
+HISTOGRAMS = (request_duration, db_duration, render_duration, query_count)
+
+
+class RequestStats:
+    """Timings collected for the current request."""
+
+    __slots__ = ('started', 'queries', 'db_time', 'render_time', 'slowest',
+                 'slowest_time', '_query_started', '_render_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.slowest = None
+        self.slowest_time = 0.0
+        self._query_started = []
+        self._render_started = []
+
+
+def current_stats():
+    """Return the :class:`RequestStats` of the current request, if recorded."""
+    if has_request_context():
+        return g.get('_request_stats')
+    return None
+
+
+def init_app(app):
+    """Enable instrumentation when ``INSTRUMENTATION_ENABLED`` is set."""
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    request_started.connect(_request_started, app)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.after_request(_record_request)
+    if app.config.get('METRICS_PATH'):
+        app.add_url_rule(app.config['METRICS_PATH'], 'metrics', metrics)
+
+
+def _request_started(sender, **extra):
+    g._request_stats = RequestStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    if stats is not None:
+        stats._query_started.append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    if stats is None or not stats._query_started:
+        return
+    elapsed = time.perf_counter() - stats._query_started.pop()
+    stats.queries += 1
+    stats.db_time += elapsed
+    if elapsed > stats.slowest_time:
+        stats.slowest, stats.slowest_time = statement, elapsed
+    threshold = current_app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000
+    if elapsed >= threshold:
+        current_app.logger.warning('Slow query (%.1f ms) in %s: %s',
+                                   elapsed * 1000, request.endpoint, statement)
+
+
+def _before_render(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None:
+        stats._render_started.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None and stats._render_started:
+        started = stats._render_started.pop()
+        # Only count the outermost render; included templates nest inside it.
+        if not stats._render_started:
+            stats.render_time += time.perf_counter() - started
+
+
+def _record_request(response):
+    stats = current_stats()
+    if stats is None:
+        return response
+    total = time.perf_counter() - stats.started
+    endpoint = request.endpoint or 'unknown'
+    request_duration.observe(total, endpoint)
+    db_duration.observe(stats.db_time, endpoint)
+    render_duration.observe(stats.render_time, endpoint)
+    query_count.observe(stats.queries, endpoint)
+
+    response.headers.add('Server-Timing', ', '.join((
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+        f'render;dur={stats.render_time * 1000:.1f}',
+        f'app;dur={total * 1000:.1f}',
+    )))
+    if total * 1000 >= current_app.config['SLOW_REQUEST_THRESHOLD_MS']:
+        current_app.logger.warning(
+            'Slow request %s %s: %.1f ms total, %d queries in %.1f ms, '
+            'render %.1f ms, slowest query %.1f ms: %s',
+            request.method, request.path, total * 1000, stats.queries,
+            stats.db_time * 1000, stats.render_time * 1000,
+            stats.slowest_time * 1000, stats.slowest)
+    return response
+
+
+def metrics():
+    """Serve the aggregated histograms in the Prometheus text format."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        # Open only to local development; elsewhere a token is required.
+        if not (current_app.debug or current_app.testing):
+            abort(404)
+    elif not hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                 f'Bearer {token}'.encode()):
+        abort(401)
+    from .identity import identity_cache
+    from .reference import reference_cache
+    from .templating import fragment_cache
+
+    lines = [histogram.render() for histogram in HISTOGRAMS]
+    caches = {'identity': identity_cache.local.stats(),
+              'reference': reference_cache.stats(),
+              'fragments': fragment_cache.stats()}
+    lines.append('# TYPE cache_hits_total counter')
+    lines.extend(f'cache_hits_total{{cache="{name}"}} {stats["hits"]}'
+                 for name, stats in caches.items())
+    lines.append('# TYPE cache_misses_total counter')
+    lines.extend(f'cache_misses_total{{cache="{name}"}} {stats["misses"]}'
+                 for name, stats in caches.items())
+    from .typeahead import vendor_typeahead
+    typeahead = vendor_typeahead.stats()
+    lines.append('# TYPE typeahead_entries gauge')
+    lines.append(f'typeahead_entries {typeahead["entries"]}')
+    lines.append('# TYPE typeahead_memory_bytes gauge')
+    lines.append(f'typeahead_memory_bytes {typeahead["bytes"]}')
+    return Response('\n'.join(lines) + '\n',
+                    mimetype='text/plain; version=0.0.4')
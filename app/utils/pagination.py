@@ -0,0 +1,155 @@
+"""Keyset (seek) pagination helpers."""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from sqlalchemy import tuple_
+from .cache import LRUCache
+from .query_plan import allow_scan
+
+# Totals by listing key; the key includes the user's search text, so the
+# cache is bounded.
+_count_cache = LRUCache(maxsize=1000)
+_SCALARS = (str, int, float, bool, date, type(None))
+
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _from_json(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    """Encode sort-key values into an opaque, URL-safe cursor string."""
+    payload = {'k': [_to_json(v) for v in values], 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into ``(values, direction)``, or ``None`` if invalid."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_from_json(v) for v in payload['k']]
+        direction = payload.get('d', 'next')
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        return None
+    if direction not in ('next', 'prev'):
+        return None
+    if not isinstance(values, list) or not all(isinstance(v, _SCALARS) for v in values):
+        return None
+    return values, direction
+
+
+def _matches(value, column):
+    """Whether a decoded cursor ``value`` can be compared with ``column``."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return True
+    if python_type is float:
+        python_type = (int, float)
+    return isinstance(value, python_type) and not (
+        isinstance(value, bool) and python_type is not bool)
+
+
+def cached_count(query, key, ttl=60):
+    """Return ``query``'s row count, reusing a cached value for ``ttl`` seconds.
+
+    Used instead of an exact ``COUNT(*)`` on every page: the total shown in
+    the UI may lag behind writes by up to ``ttl`` seconds.
+    """
+    total = _count_cache.get(key)
+    if total is None:
+        query = query.order_by(None)
+        if query.whereclause is None:
+            # Counting everything reads a whole index, once per ``ttl``.
+            query = allow_scan(query, 'cached total')
+        total = query.count()
+        _count_cache.set(key, total, ttl=ttl)
+    return total
+
+
+class KeysetPage:
+    """A page of results returned by :func:`keyset_paginate`."""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None,
+                 total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, total=None):
+    """Paginate ``query`` by seeking past the sort key encoded in ``cursor``.
+
+    ``columns`` is the ascending sort key and must end in a unique column
+    (e.g. ``(Vendor.name, Vendor.id)``) backed by a composite index, so every
+    page is an index range scan of ``per_page + 1`` rows regardless of depth.
+    A cursor that does not fit ``columns`` is ignored (the first page).
+    """
+    decoded = decode_cursor(cursor)
+    if decoded is not None and (
+            len(decoded[0]) != len(columns)
+            or not all(map(_matches, decoded[0], columns))):
+        decoded = None
+    key = tuple_(*columns)
+    if decoded is None:
+        direction = 'next'
+        query = query.order_by(*columns)
+        if query.whereclause is None:
+            # Stops after per_page + 1 rows of the sort index.
+            query = allow_scan(query, 'first page in index order')
+    else:
+        values, direction = decoded
+        if direction == 'next':
+            query = query.filter(key > tuple_(*values)).order_by(*columns)
+        else:
+            query = query.filter(key < tuple_(*values)).order_by(
+                *(column.desc() for column in columns))
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    def key_of(row):
+        return [getattr(row, column.key) for column in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'next':
+            if has_more:
+                next_cursor = encode_cursor(key_of(rows[-1]))
+            if decoded is not None:
+                prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+        else:
+            next_cursor = encode_cursor(key_of(rows[-1]))
+            if has_more:
+                prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+    return KeysetPage(rows, per_page, next_cursor, prev_cursor, total)
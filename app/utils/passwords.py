@@ -0,0 +1,138 @@
+"""Password hashing off the request threads, with admission control.
+
+Hashes are computed on a small bounded thread pool (hashlib's scrypt and
+PBKDF2 release the GIL, so the work runs in parallel with request threads).
+At most ``PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE`` hashes may be in
+flight; callers that cannot get a slot within
+``PASSWORD_HASH_ADMISSION_TIMEOUT`` seconds get :class:`HasherBusy` instead
+of queueing behind a burst of logins.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import (DEFAULT_PBKDF2_ITERATIONS, check_password_hash,
+                               generate_password_hash)
+from .cache import LRUCache
+
+
+class HasherBusy(Exception):
+    """Raised when no hashing slot frees up within the admission timeout."""
+
+
+class PasswordHasher:
+    """Bounded executor for ``werkzeug.security`` hash operations."""
+
+    def __init__(self):
+        self.executor = None
+        self.method = None
+        self.method_prefix = None
+        self._dummy = None
+
+    def init_app(self, app):
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.method = app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        self.admission_timeout = app.config.get('PASSWORD_HASH_ADMISSION_TIMEOUT', 2.0)
+        self.slots = threading.BoundedSemaphore(
+            workers + app.config.get('PASSWORD_HASH_QUEUE', 8))
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='password-hash')
+        self.method_prefix = method_prefix(self.method)
+        # Verified against for unknown users so a login takes the same time
+        # whether or not the account exists.  Computed on the pool in the
+        # background, so it neither delays startup nor runs on a request
+        # thread.
+        self._dummy = self.executor.submit(generate_password_hash, '', self.method)
+        app.extensions['password_hasher'] = self
+
+    def _dummy_hash(self):
+        return self._dummy.result()
+
+    def _run(self, func, *args):
+        if not self.slots.acquire(timeout=self.admission_timeout):
+            raise HasherBusy()
+        try:
+            return self.executor.submit(func, *args).result()
+        finally:
+            self.slots.release()
+
+    def verify(self, password_hash, password):
+        """Check ``password`` against ``password_hash`` on the pool."""
+        return self._run(check_password_hash, password_hash or self._dummy_hash(),
+                         password)
+
+    def hash(self, password):
+        """Hash ``password`` with the configured method on the pool."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def needs_rehash(self, password_hash):
+        """Whether ``password_hash`` uses a different method or cost."""
+        return password_hash.split('$', 1)[0] != self.method_prefix
+
+
+def method_prefix(method):
+    """The method part werkzeug writes for ``method``, e.g. ``'scrypt:32768:8:1'``.
+
+    Mirrors the defaults of ``werkzeug.security.generate_password_hash``.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        return 'scrypt:' + ':'.join(args or ('32768', '8', '1'))
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Invalid hash method {method!r}.')
+
+
+class LoginThrottle:
+    """Sliding-window limit on failed logins per account and per client IP.
+
+    Counters live in this process only; with several workers the effective
+    limit is per worker.
+    """
+
+    def __init__(self):
+        self.failures = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.window = app.config.get('LOGIN_THROTTLE_WINDOW', 300)
+        self.limits = {'user': app.config.get('LOGIN_MAX_FAILURES_PER_USER', 5),
+                       'ip': app.config.get('LOGIN_MAX_FAILURES_PER_IP', 20)}
+        self.failures = LRUCache(maxsize=app.config.get('LOGIN_THROTTLE_SIZE', 10000),
+                                 ttl=self.window)
+
+    def _keys(self, username, ip):
+        return [('user', username.lower()), ('ip', ip)]
+
+    def _recent(self, key, now):
+        return [t for t in self.failures.get(key, ()) if t > now - self.window]
+
+    def retry_after(self, username, ip):
+        """Seconds until another attempt is allowed, or 0 if allowed now."""
+        now = time.monotonic()
+        wait = 0
+        for key in self._keys(username, ip):
+            recent = self._recent(key, now)
+            limit = self.limits[key[0]]
+            if len(recent) >= limit:
+                wait = max(wait, recent[-limit] + self.window - now)
+        return int(wait) + 1 if wait else 0
+
+    def record_failure(self, username, ip):
+        now = time.monotonic()
+        # Read-modify-write; unlocked, concurrent failures would be lost.
+        with self._lock:
+            for key in self._keys(username, ip):
+                recent = self._recent(key, now)
+                recent.append(now)
+                self.failures.set(key, tuple(recent[-self.limits[key[0]]:]))
+
+    def reset(self, username):
+        self.failures.delete(('user', username.lower()))
+
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
@@ -0,0 +1,185 @@
+"""Query plan regression checks for the statements the views issue.
+
+Replays requests through the test client, records every SELECT they send to
+the database and runs ``EXPLAIN QUERY PLAN`` (SQLite) or ``EXPLAIN``
+(PostgreSQL) on each one, reporting any plan that scans a whole table or
+a whole index.  Deliberate scans (exports, index builds, bounded reads)
+are marked on the query with :func:`allow_scan`.
+"""
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+from sqlalchemy import event
+from ..extensions import db
+
+PlanViolation = namedtuple('PlanViolation', 'url statement detail')
+
+# Listing probes on top of the argument-free GET routes.
+DEFAULT_PROBES = (
+    '/vendors/?q=acme',
+    '/vendors/?status=active',
+    '/vendors/?category=1',
+    '/vendors/?status=active&category=1',
+    '/vendors/api?q=acme&status=active',
+)
+
+# "SCAN t", "SCAN t USING [COVERING] INDEX i" and the older
+# "SCAN TABLE t [AS a] ..."; virtual tables (full-text search) are not scans.
+_SQLITE_SCAN = re.compile(
+    r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(?: USING (?:COVERING )?INDEX \w+)?$')
+_POSTGRESQL_SCAN = re.compile(
+    r'(?:Seq Scan|Index (?:Only )?Scan(?: Backward)? using \w+) on (\w+)(?: (\w+))?')
+_ALIAS = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+AS)?\s+(\w+)', re.I)
+_ALLOW_SCAN = re.compile(r'/\* scan: ')
+
+
+def allow_scan(query, reason):
+    """Mark ``query`` (an ORM query or a select) as an intentional scan.
+
+    The reason ends up in a comment after ``SELECT``, so the statement is
+    also recognizable in slow query logs.
+    """
+    return query.prefix_with(f"/* scan: {reason.replace('*/', '')} */")
+
+
+@contextmanager
+def record_queries(engine):
+    """Collect ``(statement, parameters)`` for each SELECT run on ``engine``."""
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context,
+                              executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            queries.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def explain(connection, statement, parameters):
+    """Return the plan of ``statement`` as a list of text lines."""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[-1] for row in rows]
+    if dialect == 'postgresql':
+        # Otherwise the planner prefers sequential scans on small tables and
+        # hides missing indexes.
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters)
+        return [row[0] for row in rows]
+    raise NotImplementedError(f'No query plan support for {dialect}')
+
+
+def _postgresql_scan_lines(plan):
+    """``(line, table, alias)`` of the plan nodes reading a whole table or index."""
+    for index, line in enumerate(plan):
+        match = _POSTGRESQL_SCAN.search(line)
+        if not match:
+            continue
+        if 'Seq Scan' not in line:
+            # An index scan is bounded only by an Index Cond among the
+            # node's detail lines, which are indented below it.
+            depth = len(line) - len(line.lstrip())
+            bounded = False
+            for detail in plan[index + 1:]:
+                if '->' in detail or len(detail) - len(detail.lstrip()) <= depth:
+                    break
+                bounded = bounded or detail.strip().startswith('Index Cond:')
+            if bounded:
+                continue
+        yield line.strip(), match.group(1), match.group(2)
+
+
+def full_scans(dialect, plan, allowed_tables=(), statement='', tables=None):
+    """Return the plan lines that scan a whole table not in ``allowed_tables``.
+
+    Aliases are resolved through ``statement``; with ``tables`` (the
+    database's table names), scans of anything else, such as a
+    materialized subquery, are not reported.  Statements marked with
+    :func:`allow_scan` have none.
+    """
+    if _ALLOW_SCAN.search(statement):
+        return []
+    aliases = {alias.lower(): table for table, alias in _ALIAS.findall(statement)}
+    if dialect == 'sqlite':
+        scans = []
+        for line in plan:
+            match = _SQLITE_SCAN.match(line.strip())
+            if match:
+                scans.append((line.strip(), match.group(1), match.group(2)))
+    else:
+        scans = _postgresql_scan_lines(plan)
+    offending = []
+    for line, name, alias in scans:
+        table = aliases.get(name.lower(), name)
+        if tables is not None and table not in tables:
+            continue
+        if table not in allowed_tables:
+            offending.append(line)
+    return offending
+
+
+def default_urls(app, sample_values=None):
+    """GET URLs of the app's routes, filling route arguments from
+    ``sample_values``; routes with unknown arguments are skipped."""
+    sample_values = sample_values or {}
+    adapter = app.url_map.bind('localhost')
+    urls = []
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.endpoint == 'static':
+            continue
+        if not rule.arguments <= set(sample_values):
+            continue
+        urls.append(adapter.build(rule.endpoint,
+                                  {name: sample_values[name] for name in rule.arguments}))
+    return sorted(set(urls))
+
+
+def check_query_plans(app, urls, user_id=None, allowed_tables=()):
+    """Request each URL and return a list of :class:`PlanViolation`.
+
+    Requests are made as ``user_id`` when given.  Statements are explained
+    on a separate connection after the requests complete.
+    """
+    client = app.test_client()
+    if user_id is not None:
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+    with app.app_context():
+        engine = db.engine
+    recorded = []
+    for url in urls:
+        with record_queries(engine) as queries:
+            client.get(url)
+        recorded.extend((url, statement, parameters)
+                        for statement, parameters in queries)
+
+    violations = []
+    seen = set()
+    tables = set(db.metadata.tables)
+    with app.app_context(), engine.connect() as connection:
+        for url, statement, parameters in recorded:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            with connection.begin():
+                plan = explain(connection, statement, parameters)
+            for line in full_scans(connection.dialect.name, plan, allowed_tables,
+                                   statement, tables):
+                violations.append(PlanViolation(url, statement, line))
+    return violations
+
+
+def assert_no_full_scans(app, urls, user_id=None, allowed_tables=()):
+    """Fail with the offending statements if any request does a full scan."""
+    violations = check_query_plans(app, urls, user_id, allowed_tables)
+    if violations:
+        lines = [f'{v.url}: {v.detail}\n    {v.statement}' for v in violations]
+        raise AssertionError('Full table scans:\n' + '\n'.join(lines))
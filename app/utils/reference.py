@@ -0,0 +1,106 @@
+"""Read-through cache for small, rarely changing reference tables."""
+import time
+from collections import namedtuple
+from threading import RLock
+from sqlalchemy import event, inspect, select
+from ..extensions import db
+
+
+class ReferenceCache:
+    """Caches whole reference tables as tuples of immutable rows.
+
+    Rows are named tuples holding the model's column attributes, so they are
+    safe to share between requests and threads.  A table's entry is dropped
+    after any committed transaction that inserted, updated or deleted one of
+    its rows through the ORM; ``REFERENCE_CACHE_TTL`` bounds how long other
+    worker processes can serve a stale copy.
+    """
+
+    def __init__(self):
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self._models = {}
+        self._entries = {}
+        self._lock = RLock()
+
+    def init_app(self, app):
+        from ..models import Role, VendorCategory
+        self.ttl = app.config.get('REFERENCE_CACHE_TTL', 300)
+        self.register(VendorCategory, order_by=VendorCategory.name)
+        self.register(Role, order_by=Role.name)
+        if not event.contains(db.session, 'after_flush', _collect_changed_tables):
+            event.listen(db.session, 'after_flush', _collect_changed_tables)
+            event.listen(db.session, 'after_commit', _invalidate_changed_tables)
+            event.listen(db.session, 'after_soft_rollback', _forget_changed_tables)
+
+    def register(self, model, order_by=None):
+        """Cache ``model``'s table, ordered by ``order_by``."""
+        columns = [attr.key for attr in inspect(model).column_attrs]
+        row_type = namedtuple(f'{model.__name__}Row', columns)
+        self._models[model] = (row_type, columns, order_by)
+
+    def is_registered(self, model):
+        return model in self._models
+
+    def all(self, model):
+        """Return every row of ``model`` as a tuple of immutable rows."""
+        return self._load(model)[0]
+
+    def get(self, model, id):
+        """Return the row of ``model`` with primary key ``id``, or ``None``."""
+        return self._load(model)[1].get(id)
+
+    def invalidate(self, model=None):
+        with self._lock:
+            if model is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(model, None)
+
+    def stats(self):
+        """Return hit/miss counters and the cached row count per table."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'tables': {model.__tablename__: len(entry[0])
+                           for model, entry in self._entries.items()},
+            }
+
+    def _load(self, model):
+        with self._lock:
+            entry = self._entries.get(model)
+            if entry is not None and entry[2] > time.monotonic():
+                self.hits += 1
+                return entry
+            self.misses += 1
+        row_type, columns, order_by = self._models[model]
+        stmt = select(*(getattr(model, name) for name in columns))
+        if order_by is not None:
+            stmt = stmt.order_by(order_by)
+        rows = tuple(row_type(*row) for row in db.session.execute(stmt))
+        entry = (rows, {row.id: row for row in rows},
+                 time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[model] = entry
+        return entry
+
+
+reference_cache = ReferenceCache()
+
+
+def _collect_changed_tables(session, flush_context):
+    changed = session.info.setdefault('reference_cache_evict', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if reference_cache.is_registered(type(obj)):
+            changed.add(type(obj))
+
+
+def _invalidate_changed_tables(session):
+    for model in session.info.pop('reference_cache_evict', ()):
+        reference_cache.invalidate(model)
+
+
+def _forget_changed_tables(session, previous_transaction):
+    session.info.pop('reference_cache_evict', None)
@@ -0,0 +1,14 @@
+"""Startup cost accounting for the application factory."""
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def timed(app, component):
+    """Record the wall time of the block in ``app.extensions['startup']``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = app.extensions.setdefault('startup', {})
+        timings[component] = timings.get(component, 0.0) + time.perf_counter() - started
@@ -0,0 +1,104 @@
+"""Content-addressed blob storage for vendor documents.
+
+Uploads are streamed to disk in chunks while being hashed, sized and
+sniffed, then stored under their SHA-256 digest, so the same file uploaded
+for several vendors is kept once.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+from collections import namedtuple
+from flask import current_app
+
+StoredBlob = namedtuple('StoredBlob', 'digest path size mime_type')
+
+CHUNK_SIZE = 64 * 1024
+
+# (prefix, MIME type) checked against the first bytes of an upload.
+_SIGNATURES = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword'),
+)
+_ZIP_SIGNATURE = b'PK\x03\x04'
+
+
+def sniff_mime_type(head, filename=None, declared=None):
+    """Guess a MIME type from the first bytes, falling back to the name."""
+    for prefix, mime_type in _SIGNATURES:
+        if head.startswith(prefix):
+            return mime_type
+    guessed = mimetypes.guess_type(filename)[0] if filename else None
+    if head.startswith(_ZIP_SIGNATURE):
+        # Office documents are zip archives; only the name tells them apart.
+        return guessed or 'application/zip'
+    return guessed or declared or 'application/octet-stream'
+
+
+class BlobStore:
+    """Stores blobs under ``root`` as ``ab/cd/<sha256>``."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def save_stream(self, stream, filename=None, declared_type=None,
+                    chunk_size=CHUNK_SIZE):
+        """Copy ``stream`` into the store and return a :class:`StoredBlob`."""
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    if len(head) < 16:
+                        head += chunk[:16 - len(head)]
+                    digest.update(chunk)
+                    size += len(chunk)
+                    tmp.write(chunk)
+            hexdigest = digest.hexdigest()
+            path = self.relative_path(hexdigest)
+            target = os.path.join(self.root, path)
+            if os.path.exists(target):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return StoredBlob(hexdigest, path, size,
+                          sniff_mime_type(head, filename, declared_type))
+
+    @staticmethod
+    def relative_path(digest):
+        return os.path.join(digest[:2], digest[2:4], digest)
+
+    def absolute_path(self, path):
+        """Resolve a stored relative path, refusing paths outside the root."""
+        absolute = os.path.abspath(os.path.join(self.root, path))
+        if os.path.commonpath([absolute, self.root]) != self.root:
+            raise ValueError(f'Path outside the blob store: {path}')
+        return absolute
+
+
+def init_app(app):
+    root = app.config.get('STORAGE_ROOT') or os.path.join(app.instance_path, 'blobs')
+    app.extensions['blob_store'] = BlobStore(root)
+
+
+def blob_store():
+    """Return the current app's :class:`BlobStore`."""
+    return current_app.extensions['blob_store']
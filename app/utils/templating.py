@@ -0,0 +1,71 @@
+"""Template compilation and fragment caches."""
+import os
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from .cache import LRUCache
+
+# Rendered fragments, shared by all templates of the process.
+fragment_cache = LRUCache(maxsize=2000, ttl=600)
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache 'name', key, ... %}...{% endcache %}`` renders its body
+    once per distinct key and serves the markup from :data:`fragment_cache`.
+
+    The key must cover everything the body depends on (typically an id and
+    an ``updated_at``, plus any per-user switch such as a permission), since
+    entries are only dropped by LRU eviction and the TTL.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        # Two blocks with the same key parts never share an entry.
+        block = nodes.Const(f'{parser.name}:{lineno}')
+        call = self.call_method('_render_cached', [block, nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, block, parts, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = (block, *parts)
+        markup = cache.get(key)
+        if markup is None:
+            markup = Markup(caller())
+            cache.set(key, markup)
+        return markup
+
+
+def init_app(app):
+    """Configure the Jinja environment; call before it is first used.
+
+    Compiled templates are kept in ``JINJA_BYTECODE_CACHE_DIR`` (by default
+    under the instance folder), so new workers load bytecode instead of
+    parsing and compiling every template again.  ``FRAGMENT_CACHE_SIZE``
+    of 0 turns ``{% cache %}`` blocks into plain blocks.
+    """
+    options = dict(app.jinja_options)
+    options['extensions'] = [*options.get('extensions', ()), FragmentCacheExtension]
+    if app.config.get('JINJA_BYTECODE_CACHE', True):
+        directory = (app.config.get('JINJA_BYTECODE_CACHE_DIR')
+                     or os.path.join(app.instance_path, 'jinja_cache'))
+        os.makedirs(directory, exist_ok=True)
+        options['bytecode_cache'] = FileSystemBytecodeCache(directory)
+    app.jinja_options = options
+
+    size = app.config.get('FRAGMENT_CACHE_SIZE', 2000)
+    if size:
+        fragment_cache.maxsize = size
+        fragment_cache.ttl = app.config.get('FRAGMENT_CACHE_TTL', 600)
+        app.jinja_env.fragment_cache = fragment_cache
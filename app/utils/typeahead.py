@@ -0,0 +1,229 @@
+"""In-process prefix index for vendor name autocomplete."""
+import re
+import sys
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from threading import RLock
+from sqlalchemy import event, select
+from ..extensions import db
+from ..models import Vendor
+from ..models.dedup import normalize_tax_id
+from .change_feed import read_changes, CursorError
+from .pagination import encode_cursor
+from .query_plan import allow_scan
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+# Keys are truncated; longer prefixes are rarely typed.
+MAX_KEY_LENGTH = 64
+# Words after the first that start a key of their own ("acme supply" is
+# also found by "supply").
+MAX_WORD_KEYS = 4
+
+
+def normalize(text):
+    """Lower-case ASCII words separated by single spaces."""
+    if not text:
+        return ''
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return _NON_WORD.sub(' ', text.casefold()).strip()
+
+
+def index_keys(name, legal_name=None, tax_id=None):
+    """Prefix keys a vendor with these values is found under."""
+    keys = set()
+    for value in (name, legal_name):
+        words = normalize(value).split()
+        for start in range(min(len(words), MAX_WORD_KEYS + 1)):
+            keys.add(' '.join(words[start:])[:MAX_KEY_LENGTH])
+    tax = normalize_tax_id(tax_id).lower()
+    if tax:
+        keys.add(tax[:MAX_KEY_LENGTH])
+    keys.discard('')
+    return keys
+
+
+class TypeaheadIndex:
+    """Sorted array of ``'<key>\\0<vendor id>'`` entries, searched with bisect.
+
+    Built from the vendors table on first use.  Changes committed in this
+    process, through the ORM or through the bulk statements that call
+    :func:`stage_bulk_changes`, are applied when the transaction commits;
+    changes made by other processes are picked up from the change feed at
+    most every ``TYPEAHEAD_SYNC_SECONDS``.
+    """
+
+    def __init__(self):
+        self.sync_seconds = 10
+        self.lag_seconds = 5
+        self.build_seconds = None
+        self._entries = []
+        self._vendors = {}  # id: (name, tax_id, entries)
+        self._bytes = 0  # held by the entries and values, without the containers
+        self._cursor = None
+        self._next_sync = 0.0
+        self._built = False
+        self._lock = RLock()
+
+    def init_app(self, app):
+        self.sync_seconds = app.config.get('TYPEAHEAD_SYNC_SECONDS', 10)
+        self.lag_seconds = app.config.get('CHANGE_FEED_LAG_SECONDS', 5)
+        if not event.contains(db.session, 'after_flush', _collect_vendor_changes):
+            event.listen(db.session, 'after_flush', _collect_vendor_changes)
+            event.listen(db.session, 'after_commit', _apply_vendor_changes)
+            event.listen(db.session, 'after_soft_rollback', _forget_vendor_changes)
+
+    @property
+    def built(self):
+        return self._built
+
+    def build(self):
+        """(Re)load every vendor; returns the number indexed."""
+        started = time.perf_counter()
+        # Changes after this point are replayed from the change feed.
+        cursor = encode_cursor([datetime.utcnow() - timedelta(seconds=self.lag_seconds), 0])
+        rows = db.session.execute(allow_scan(
+            select(Vendor.id, Vendor.name, Vendor.legal_name, Vendor.tax_id),
+            'typeahead index build'))
+        entries, vendors, size = [], {}, 0
+        for id, name, legal_name, tax_id in rows:
+            own = tuple(f'{key}\0{id}' for key in index_keys(name, legal_name, tax_id))
+            entries.extend(own)
+            vendors[id] = value = (name, tax_id, own)
+            size += _footprint(id, value)
+        entries.sort()
+        with self._lock:
+            self._entries, self._vendors, self._bytes = entries, vendors, size
+            self._cursor = cursor
+            self._next_sync = time.monotonic() + self.sync_seconds
+            self._built = True
+        self.build_seconds = time.perf_counter() - started
+        return len(vendors)
+
+    def apply(self, changes):
+        """Apply ``{vendor id: (name, legal_name, tax_id) or None}``."""
+        with self._lock:
+            for id, values in changes.items():
+                old = self._vendors.pop(id, None)
+                if old is not None:
+                    self._bytes -= _footprint(id, old)
+                    for entry in old[2]:
+                        index = bisect_left(self._entries, entry)
+                        if index < len(self._entries) and self._entries[index] == entry:
+                            del self._entries[index]
+                if values is not None:
+                    name, legal_name, tax_id = values
+                    own = tuple(f'{key}\0{id}' for key in index_keys(*values))
+                    for entry in own:
+                        insort(self._entries, entry)
+                    self._vendors[id] = value = (name, tax_id, own)
+                    self._bytes += _footprint(id, value)
+
+    def sync(self):
+        """Apply the vendor changes of other processes from the change feed."""
+        with self._lock:
+            cursor = self._cursor
+            self._next_sync = time.monotonic() + self.sync_seconds
+        while True:
+            try:
+                page = read_changes('vendors', cursor, 1000, lag_seconds=self.lag_seconds)
+            except CursorError:
+                self.build()
+                return
+            self.apply({
+                item['id']: ((item['data']['name'], item['data']['legal_name'],
+                              item['data']['tax_id']) if item['op'] == 'upsert' else None)
+                for item in page.items})
+            cursor = page.next_cursor
+            if not page.has_more:
+                break
+        with self._lock:
+            self._cursor = cursor
+
+    def search(self, query, limit=10):
+        """Up to ``limit`` ``(id, name, tax_id)`` of vendors matching ``query``.
+
+        Matches are ordered by the matching key: shorter and alphabetically
+        earlier completions first, name matches before tax ID matches.
+        """
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self.build()
+        elif time.monotonic() >= self._next_sync:
+            self.sync()
+        prefixes = [normalize(query)[:MAX_KEY_LENGTH],
+                    normalize_tax_id(query).lower()[:MAX_KEY_LENGTH]]
+        found = []
+        with self._lock:
+            entries = self._entries
+            for prefix in dict.fromkeys(filter(None, prefixes)):
+                index = bisect_left(entries, prefix)
+                while index < len(entries) and len(found) < limit:
+                    entry = entries[index]
+                    if not entry.startswith(prefix):
+                        break
+                    id = int(entry[entry.rindex('\0') + 1:])
+                    if id not in found:
+                        found.append(id)
+                    index += 1
+            return [(id, *self._vendors[id][:2]) for id in found]
+
+    def stats(self):
+        """Entry and vendor counts and the approximate memory footprint in bytes."""
+        with self._lock:
+            size = (self._bytes + sys.getsizeof(self._entries)
+                    + sys.getsizeof(self._vendors))
+            return {'built': self._built, 'vendors': len(self._vendors),
+                    'entries': len(self._entries), 'bytes': size,
+                    'build_seconds': self.build_seconds}
+
+
+def _footprint(id, value):
+    """Bytes held for one vendor: its id, value tuple, strings and entries."""
+    name, tax_id, own = value
+    return (sys.getsizeof(id) + sys.getsizeof(value) + sys.getsizeof(name)
+            + sys.getsizeof(tax_id) + sys.getsizeof(own)
+            + sum(sys.getsizeof(entry) for entry in own))
+
+
+vendor_typeahead = TypeaheadIndex()
+
+
+def _collect_vendor_changes(session, flush_context):
+    changes = session.info.setdefault('typeahead_changes', {})
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Vendor) and obj not in session.deleted:
+            changes[obj.id] = (obj.name, obj.legal_name, obj.tax_id)
+    for obj in session.deleted:
+        if isinstance(obj, Vendor):
+            changes[obj.id] = None
+
+
+def stage_bulk_changes(written=(), deleted=()):
+    """Stage vendors written or deleted by bulk statements for the index.
+
+    Bulk statements bypass the flush hook, so their callers pass the ids
+    they touched; the changes are applied when the transaction commits.
+    """
+    changes = db.session.info.setdefault('typeahead_changes', {})
+    if written and vendor_typeahead.built:
+        rows = db.session.execute(
+            select(Vendor.id, Vendor.name, Vendor.legal_name, Vendor.tax_id)
+            .where(Vendor.id.in_(list(written))))
+        for id, name, legal_name, tax_id in rows:
+            changes[id] = (name, legal_name, tax_id)
+    for id in deleted:
+        changes[id] = None
+
+
+def _apply_vendor_changes(session):
+    changes = session.info.pop('typeahead_changes', None)
+    if changes and vendor_typeahead.built:
+        vendor_typeahead.apply(changes)
+
+
+def _forget_vendor_changes(session, previous_transaction):
+    session.info.pop('typeahead_changes', None)
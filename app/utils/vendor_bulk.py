@@ -0,0 +1,132 @@
+"""Set-based bulk operations over a selection of vendors.
+
+Each operation runs a handful of ``UPDATE``/``DELETE`` statements over the
+vendors matching ``criteria`` (the same criteria the listing filters build,
+or ``Vendor.id.in_(ids)``) in one transaction, without loading the rows.
+The dashboard counters, which are normally maintained by the flush hook,
+are adjusted from grouped counts taken in the same transaction, and
+deletions leave change-feed tombstones and are staged for the typeahead
+index.  Status and category changes do not touch the indexed fields.
+"""
+from collections import Counter
+from sqlalchemy import select, update, delete, func
+from ..extensions import db
+from ..models import (Vendor, VendorContact, VendorDocument, VendorDocumentNotice,
+                      DashboardCounter, Tombstone, vendor_blocking_keys)
+from ..models.dashboard import vendor_buckets, document_buckets
+from .typeahead import stage_bulk_changes
+
+
+class BulkResult:
+    """Rows affected by a bulk operation, per table."""
+
+    def __init__(self, **counts):
+        self.counts = counts
+
+    @property
+    def vendors(self):
+        return self.counts.get('vendors', 0)
+
+    def to_dict(self):
+        return dict(self.counts)
+
+    def __str__(self):
+        return ', '.join(f'{count} {table}' for table, count in self.counts.items())
+
+
+def _vendor_ids(criteria):
+    return select(Vendor.id).where(*criteria).scalar_subquery()
+
+
+def _vendor_groups(criteria):
+    """``(status, category_id, count)`` of the selected vendors."""
+    return db.session.execute(
+        select(Vendor.status, Vendor.category_id, func.count())
+        .where(*criteria)
+        .group_by(Vendor.status, Vendor.category_id)).all()
+
+
+def _run(operation):
+    try:
+        result = operation()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
+
+
+def _update_vendors(criteria, column, value):
+    def operation():
+        # Rows that already have the value are left alone, so they keep
+        # their updated_at and are not counted.
+        selected = list(criteria) + [column.is_distinct_from(value)]
+        deltas = Counter()
+        for status, category_id, count in _vendor_groups(selected):
+            new = {'status': status, 'category_id': category_id, column.key: value}
+            for bucket in vendor_buckets(status, category_id):
+                deltas[bucket] -= count
+            for bucket in vendor_buckets(new['status'], new['category_id']):
+                deltas[bucket] += count
+        result = db.session.execute(
+            update(Vendor).where(*selected).values({column.key: value})
+            .execution_options(synchronize_session=False))
+        DashboardCounter.adjust(deltas)
+        return BulkResult(vendors=result.rowcount)
+    return _run(operation)
+
+
+def set_status(criteria, status):
+    """Set the status of the selected vendors."""
+    return _update_vendors(criteria, Vendor.status, status)
+
+
+def set_category(criteria, category_id):
+    """Move the selected vendors to ``category_id`` (``None`` to clear it)."""
+    return _update_vendors(criteria, Vendor.category_id, category_id)
+
+
+def delete_vendors(criteria):
+    """Delete the selected vendors with their contacts, documents and notices.
+
+    Stored document files are left in the blob store: they are content
+    addressed and may be shared with other documents.
+    """
+    def operation():
+        vendor_ids = _vendor_ids(criteria)
+        document_ids = (select(VendorDocument.id)
+                        .where(VendorDocument.vendor_id.in_(vendor_ids))
+                        .scalar_subquery())
+        deltas = Counter()
+        for status, category_id, count in _vendor_groups(criteria):
+            for bucket in vendor_buckets(status, category_id):
+                deltas[bucket] -= count
+        for expiry_date, count in db.session.execute(
+                select(VendorDocument.expiry_date, func.count())
+                .where(VendorDocument.vendor_id.in_(vendor_ids))
+                .group_by(VendorDocument.expiry_date)):
+            for bucket in document_buckets(expiry_date):
+                deltas[bucket] -= count
+
+        stage_bulk_changes(deleted=db.session.scalars(
+            select(Vendor.id).where(*criteria)).all())
+        db.session.execute(delete(vendor_blocking_keys)
+                           .where(vendor_blocking_keys.c.vendor_id.in_(vendor_ids)))
+        Tombstone.record('documents', [VendorDocument.vendor_id.in_(vendor_ids)])
+        Tombstone.record('contacts', [VendorContact.vendor_id.in_(vendor_ids)])
+        Tombstone.record('vendors', criteria)
+        counts = {}
+        for table, stmt in (
+                ('notices', delete(VendorDocumentNotice)
+                 .where(VendorDocumentNotice.document_id.in_(document_ids))),
+                ('documents', delete(VendorDocument)
+                 .where(VendorDocument.vendor_id.in_(vendor_ids))),
+                ('contacts', delete(VendorContact)
+                 .where(VendorContact.vendor_id.in_(vendor_ids))),
+                ('vendors', delete(Vendor).where(*criteria))):
+            result = db.session.execute(
+                stmt.execution_options(synchronize_session=False))
+            counts[table] = result.rowcount
+        DashboardCounter.adjust(deltas)
+        return BulkResult(**counts)
+    return _run(operation)
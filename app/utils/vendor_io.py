@@ -0,0 +1,335 @@
+"""Streaming vendor import and export in CSV and JSON Lines formats."""
+import csv
+import io
+import json
+import tempfile
+import time
+from collections import Counter
+from itertools import islice
+from sqlalchemy import select, insert, update, delete
+from ..extensions import db
+from ..models import Vendor, VendorCategory, VendorContact, DashboardCounter, Tombstone
+from ..models.dashboard import vendor_buckets
+from ..models.dedup import refresh_blocking_keys
+from .query_plan import allow_scan
+from .typeahead import stage_bulk_changes
+
+FORMATS = ('csv', 'jsonl')
+
+VENDOR_FIELDS = (
+    'name', 'legal_name', 'tax_id', 'website', 'status',
+    'address_line1', 'address_line2', 'city', 'state', 'postal_code', 'country',
+    'bank_name', 'bank_account_name', 'bank_account_number', 'bank_routing_number',
+)
+CONTACT_FIELDS = ('name', 'title', 'email', 'phone', 'is_primary')
+
+# CSV rows are flat, so they carry the primary contact only.
+CSV_CONTACT_COLUMNS = ('contact_name', 'contact_title', 'contact_email', 'contact_phone')
+CSV_COLUMNS = ('id',) + VENDOR_FIELDS + ('category',) + CSV_CONTACT_COLUMNS
+# Spreadsheets evaluate cells starting with these as formulas.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def guess_format(filename, default='csv'):
+    """Pick the format from a file name's extension."""
+    for fmt in FORMATS:
+        if filename and filename.lower().endswith('.' + fmt):
+            return fmt
+    if filename and filename.lower().endswith('.json'):
+        return 'jsonl'
+    return default
+
+
+class ImportStats:
+    """Running totals of a vendor import."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.contacts = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f'{self.rows} rows ({self.inserted} inserted, {self.updated} '
+                f'updated, {self.contacts} contacts) in {self.elapsed:.1f}s, '
+                f'{self.rows_per_second:.0f} rows/s')
+
+
+# Reading
+
+def read_records(stream, fmt):
+    """Yield vendor records (dicts with a ``contacts`` list) from ``stream``."""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield _record_from_csv(row)
+    elif fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+
+def _unescape(value):
+    """Undo :func:`_escape_formula`, so exported files import unchanged."""
+    if isinstance(value, str) and value[:1] == "'" and value[1:].startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value or None
+
+
+def _record_from_csv(row):
+    row = {name: _unescape(value) for name, value in row.items()}
+    record = {field: row[field] for field in VENDOR_FIELDS if field in row}
+    record['category'] = row.get('category')
+    if row.get('contact_name'):
+        record['contacts'] = [{
+            'name': row['contact_name'],
+            'title': row.get('contact_title'),
+            'email': row.get('contact_email'),
+            'phone': row.get('contact_phone'),
+            'is_primary': True,
+        }]
+    return record
+
+
+# Importing
+
+def import_vendors(records, batch_size=1000, progress=None):
+    """Insert or update vendors from ``records``, upserting on ``tax_id``.
+
+    Records are written in batches of ``batch_size`` rows, each with a few
+    multi-row statements and its own commit, so memory and transaction size
+    stay bounded.  A record's ``contacts``, when present, replace the
+    vendor's existing contacts.  ``progress`` is called with the running
+    :class:`ImportStats` after every batch.
+    """
+    stats = ImportStats()
+    categories = {row.name: row.id for row in db.session.execute(
+        select(VendorCategory.name, VendorCategory.id))}
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        try:
+            _import_batch(batch, categories, stats)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if progress is not None:
+            progress(stats)
+    return stats
+
+
+def _import_batch(batch, categories, stats):
+    # A tax ID seen twice in one batch is upserted once, last record winning.
+    by_tax_id = {}
+    untaxed = []
+    for record in batch:
+        if not record.get('name'):
+            raise ValueError(f'Vendor record without a name: {record!r}')
+        if record.get('tax_id'):
+            by_tax_id[record['tax_id']] = record
+        else:
+            untaxed.append(record)
+    stats.rows += len(batch)
+
+    existing = {}
+    if by_tax_id:
+        rows = db.session.execute(
+            select(Vendor.tax_id, Vendor.id, Vendor.status, Vendor.category_id)
+            .where(Vendor.tax_id.in_(list(by_tax_id)))
+            .order_by(Vendor.id.desc()))
+        existing = {row.tax_id: row for row in rows}  # lowest ID wins for duplicated tax IDs
+
+    # These bulk statements bypass the flush hooks that maintain the
+    # dashboard counters, change-feed tombstones and typeahead index, so
+    # the batch adjusts them itself.
+    deltas = Counter()
+    updates, update_records, inserts, insert_records = [], [], [], []
+    for tax_id, record in by_tax_id.items():
+        values = _vendor_values(record, categories)
+        if tax_id in existing:
+            old = existing[tax_id]
+            deltas.subtract(vendor_buckets(old.status, old.category_id))
+            deltas.update(vendor_buckets(values.get('status', old.status),
+                                         values.get('category_id', old.category_id)))
+            updates.append(dict(values, id=old.id))
+            update_records.append(record)
+        else:
+            inserts.append(values)
+            insert_records.append(record)
+    for record in untaxed:
+        inserts.append(_vendor_values(record, categories))
+        insert_records.append(record)
+
+    vendor_ids = []
+    if updates:
+        db.session.execute(update(Vendor), updates)
+        stats.updated += len(updates)
+        vendor_ids.extend(values['id'] for values in updates)
+    if inserts:
+        inserts = [dict(values, status=values.get('status') or 'active')
+                   for values in inserts]
+        for values in inserts:
+            deltas.update(vendor_buckets(values['status'], values.get('category_id')))
+        result = db.session.execute(
+            insert(Vendor).returning(Vendor.id, sort_by_parameter_order=True),
+            inserts)
+        vendor_ids.extend(result.scalars().all())
+        stats.inserted += len(inserts)
+
+    contacts, replaced = [], []
+    for vendor_id, record in zip(vendor_ids, update_records + insert_records):
+        if record.get('contacts') is None:
+            continue
+        replaced.append(vendor_id)
+        for contact in record['contacts']:
+            contacts.append(dict(
+                {field: contact.get(field) for field in CONTACT_FIELDS},
+                vendor_id=vendor_id, is_primary=bool(contact.get('is_primary'))))
+    if replaced and updates:
+        Tombstone.record('contacts', [VendorContact.vendor_id.in_(replaced)])
+        db.session.execute(
+            delete(VendorContact).where(VendorContact.vendor_id.in_(replaced)))
+    if contacts:
+        db.session.execute(insert(VendorContact), contacts)
+        stats.contacts += len(contacts)
+    DashboardCounter.adjust(deltas)
+    refresh_blocking_keys(vendor_ids)
+    stage_bulk_changes(written=vendor_ids)
+
+
+def _vendor_values(record, categories):
+    values = {field: record[field] for field in VENDOR_FIELDS if field in record}
+    category = record.get('category')
+    if category:
+        if category not in categories:
+            new = VendorCategory(name=category)
+            db.session.add(new)
+            db.session.flush()
+            categories[category] = new.id
+        values['category_id'] = categories[category]
+    return values
+
+
+# Exporting
+
+def iter_records(criteria=(), batch_size=1000):
+    """Yield vendor records (with contacts) matching ``criteria``.
+
+    Vendors are streamed as plain rows ``batch_size`` at a time; the contacts
+    of each batch are fetched with one extra query, so memory use does not
+    grow with the number of vendors exported.
+    """
+    columns = [Vendor.id] + [getattr(Vendor, field) for field in VENDOR_FIELDS]
+    # Exports are bulk reads by design; filtered ones may scan too, since
+    # walking the primary key beats sorting a large share of the table.
+    stmt = (allow_scan(select(*columns, VendorCategory.name.label('category')), 'export')
+            .outerjoin(VendorCategory, Vendor.category_id == VendorCategory.id)
+            .where(*criteria)
+            .order_by(Vendor.id)
+            .execution_options(yield_per=batch_size))
+    result = db.session.execute(stmt)
+    for partition in result.partitions():
+        ids = [row.id for row in partition]
+        contacts = {}
+        for contact in db.session.execute(
+                select(VendorContact.vendor_id,
+                       *(getattr(VendorContact, field) for field in CONTACT_FIELDS))
+                .where(VendorContact.vendor_id.in_(ids))
+                .order_by(VendorContact.vendor_id,
+                          VendorContact.is_primary.desc(), VendorContact.id)):
+            contacts.setdefault(contact.vendor_id, []).append(
+                {field: getattr(contact, field) for field in CONTACT_FIELDS})
+        for row in partition:
+            record = dict(row._mapping)
+            record['contacts'] = contacts.get(row.id, [])
+            yield record
+
+
+def _escape_formula(value):
+    """Prefix text a spreadsheet would run as a formula with ``'``."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_row(record):
+    """Flatten a record into the values of :data:`CSV_COLUMNS`.
+
+    Text that starts like a formula is escaped, since these files are
+    opened in spreadsheets.
+    """
+    primary = next((c for c in record['contacts'] if c['is_primary']),
+                   record['contacts'][0] if record['contacts'] else {})
+    values = ([record['id']] + [record[field] for field in VENDOR_FIELDS]
+              + [record['category']]
+              + [primary.get(field) for field in ('name', 'title', 'email', 'phone')])
+    return [_escape_formula(value) for value in values]
+
+
+def write_records(records, stream, fmt):
+    """Write ``records`` to a text stream; returns the number written."""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(CSV_COLUMNS)
+        for record in records:
+            writer.writerow(csv_row(record))
+            count += 1
+    elif fmt == 'jsonl':
+        for record in records:
+            stream.write(json.dumps(record, default=str) + '\n')
+            count += 1
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+    return count
+
+
+def iter_csv_chunks(records, chunk_size=64 * 1024):
+    """Yield CSV text for ``records`` in chunks of roughly ``chunk_size``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for record in records:
+        writer.writerow(csv_row(record))
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_xlsx_chunks(records, chunk_size=64 * 1024):
+    """Yield an XLSX workbook of ``records`` in chunks of ``chunk_size`` bytes.
+
+    Requires openpyxl.  The workbook is built in write-only mode, which
+    streams rows to a temporary file, and is then read back in chunks: XLSX
+    is a zip archive, so nothing can be sent before the last row is written.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Vendors')
+    sheet.append(CSV_COLUMNS)
+    for record in records:
+        sheet.append(csv_row(record))
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,83 @@
+"""Helpers shared by the data generator, query and load benchmarks."""
+import json
+import os
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_DATABASE = f"sqlite:///{ROOT / 'instance' / 'bench.db'}"
+
+
+def make_app(database, config_name='production', **overrides):
+    """``create_app`` against ``database``, outside of the ``flask`` CLI.
+
+    ``overrides`` are passed as ``FLASK_*`` environment variables, so they
+    are already set while the extensions initialize.
+    """
+    os.environ['DATABASE_URL'] = database
+    os.environ.pop('FLASK_RUN_FROM_CLI', None)
+    for name, value in overrides.items():
+        os.environ[f'FLASK_{name}'] = json.dumps(value)
+    if database.startswith('sqlite:///'):
+        Path(database[len('sqlite:///'):]).parent.mkdir(parents=True, exist_ok=True)
+    from app import create_app
+
+    return create_app(config_name)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(**extra):
+    """Metadata recorded with every result file."""
+    return dict(revision=git_revision(), python=platform.python_version(), **extra)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values):
+    """min/mean/p50/p95/p99/max of ``values``."""
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        'min': values[0],
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'max': values[-1],
+    }
+
+
+def load_result(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_result(result, path):
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+
+
+def change(value, base_value):
+    """``' +12.3%'``-style relative change, or ``''`` without a baseline."""
+    if value is None or not base_value:
+        return ''
+    return f'  {(value - base_value) / base_value * 100:+7.1f}%'
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+"""Synthetic data generator: a seeded, reproducible vendor database.
+
+Creates the schema in an empty database (or one emptied with ``--reset``)
+and fills it with categories, roles, users, vendors, contacts and
+documents.  The same ``--seed``, sizes and ``--base-date`` always produce
+the same rows, so benchmark results from different commits are comparable::
+
+    python benchmarks/datagen.py --vendors 100000
+    python benchmarks/datagen.py --database postgresql://localhost/bench --reset
+
+Rows are written with multi-row inserts, then the derived tables
+(dashboard counters, duplicate-detection blocking keys) are rebuilt and
+the database is stamped with the current migration.  Every generated user
+has the password ``benchmark``.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from common import DEFAULT_DATABASE, ROOT, make_app
+
+CATEGORIES = (
+    'Audio & Video', 'Catering', 'Childcare', 'Cleaning', 'Construction',
+    'Electrical', 'Facilities', 'Flowers', 'Furniture', 'HVAC', 'Insurance',
+    'IT Services', 'Landscaping', 'Legal', 'Music', 'Office Supplies',
+    'Plumbing', 'Printing', 'Security', 'Transportation',
+)
+ADJECTIVES = (
+    'Acme', 'Apex', 'Atlas', 'Beacon', 'Blue Ridge', 'Bright', 'Cardinal',
+    'Cedar', 'Central', 'Civic', 'Clearwater', 'Coastal', 'Covenant', 'Crown',
+    'Eagle', 'Evergreen', 'First', 'Front Range', 'Golden', 'Grace', 'Granite',
+    'Harbor', 'Heritage', 'Highland', 'Hope', 'Keystone', 'Lakeside', 'Liberty',
+    'Lighthouse', 'Maple', 'Meridian', 'Mission', 'Northstar', 'Oak', 'Pacific',
+    'Pioneer', 'Prairie', 'Redwood', 'River', 'Shepherd', 'Silver', 'Summit',
+    'Sunrise', 'Trinity', 'Union', 'Valley', 'Victory', 'Westside', 'Willow',
+)
+NOUNS = (
+    'Audio', 'Builders', 'Catering', 'Cleaning', 'Communications', 'Consulting',
+    'Design', 'Electric', 'Events', 'Florists', 'Foods', 'Glass', 'Heating',
+    'Lighting', 'Maintenance', 'Mechanical', 'Office', 'Paving', 'Plumbing',
+    'Press', 'Roofing', 'Security', 'Signs', 'Solutions', 'Supply', 'Systems',
+    'Technologies', 'Transport', 'Tree Care', 'Uniforms',
+)
+SUFFIXES = ('', '', '', 'Inc', 'Inc.', 'LLC', 'Co', 'Company', 'Corp', '& Sons', 'Group')
+FIRST_NAMES = (
+    'Alex', 'Ana', 'Ben', 'Carla', 'Chen', 'Dana', 'David', 'Elena', 'Femi',
+    'Grace', 'Hannah', 'Ivan', 'James', 'Jin', 'Kate', 'Luis', 'Maria', 'Mark',
+    'Nadia', 'Omar', 'Priya', 'Ruth', 'Sam', 'Sara', 'Tom', 'Yusuf', 'Zoe',
+)
+LAST_NAMES = (
+    'Adams', 'Baker', 'Chen', 'Davis', 'Evans', 'Garcia', 'Hall', 'Ibrahim',
+    'Jones', 'Kim', 'Lopez', 'Miller', 'Nguyen', 'Okafor', 'Patel', 'Quinn',
+    'Reyes', 'Smith', 'Taylor', 'Walker', 'Young',
+)
+STREETS = ('Main', 'Church', 'Oak', 'Maple', 'Park', 'Washington', 'Lake',
+           'Hill', 'Pine', 'Cedar', 'Elm', 'Market', 'Mill', 'River')
+STREET_TYPES = ('St', 'Street', 'Ave', 'Avenue', 'Rd', 'Blvd', 'Dr', 'Ln')
+CITIES = (('Springfield', 'IL'), ('Columbus', 'OH'), ('Austin', 'TX'),
+          ('Portland', 'OR'), ('Denver', 'CO'), ('Nashville', 'TN'),
+          ('Raleigh', 'NC'), ('Madison', 'WI'), ('Boise', 'ID'), ('Tampa', 'FL'))
+DOCUMENT_TYPES = ('insurance', 'w9', 'contract', 'license', 'certificate')
+
+BATCH_SIZE = 5000
+
+
+def _stamps(rng, now):
+    created = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+    updated = created + timedelta(seconds=rng.randrange(int((now - created).total_seconds()) + 1))
+    return created, updated
+
+
+def vendor_rows(rng, count, category_ids, now):
+    """Vendor rows with explicit ids 1..count."""
+    for id in range(1, count + 1):
+        name = ' '.join(filter(None, (rng.choice(ADJECTIVES), rng.choice(NOUNS),
+                                      rng.choice(SUFFIXES))))
+        city, state = rng.choice(CITIES)
+        created, updated = _stamps(rng, now)
+        yield {
+            'id': id,
+            'name': name,
+            'legal_name': f'{name} Holdings' if rng.random() < 0.2 else None,
+            'tax_id': f'{rng.randrange(10, 99)}-{id:07d}' if rng.random() < 0.9 else None,
+            'website': f'https://vendor{id}.example.org' if rng.random() < 0.5 else None,
+            'status': 'active' if rng.random() < 0.85 else 'inactive',
+            'category_id': rng.choice(category_ids) if rng.random() < 0.9 else None,
+            'address_line1': f'{rng.randrange(1, 9999)} {rng.choice(STREETS)} {rng.choice(STREET_TYPES)}',
+            'city': city,
+            'state': state,
+            'postal_code': f'{rng.randrange(10000, 99999)}',
+            'country': 'USA',
+            'created_at': created,
+            'updated_at': updated,
+        }
+
+
+def contact_rows(rng, vendor_count, now):
+    for vendor_id in range(1, vendor_count + 1):
+        for index in range(rng.choice((1, 1, 2, 2, 3))):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            created, updated = _stamps(rng, now)
+            yield {
+                'vendor_id': vendor_id,
+                'name': f'{first} {last}',
+                'title': rng.choice((None, 'Owner', 'Manager', 'Sales', 'Accounts')),
+                'email': f'{first}.{last}{vendor_id}@example.org'.lower(),
+                'phone': f'555-{rng.randrange(1000000):07d}',
+                'is_primary': index == 0,
+                'created_at': created,
+                'updated_at': updated,
+            }
+
+
+def document_rows(rng, vendor_count, base_date, now):
+    for vendor_id in range(1, vendor_count + 1):
+        for _ in range(rng.choice((0, 1, 1, 2))):
+            document_type = rng.choice(DOCUMENT_TYPES)
+            created, updated = _stamps(rng, now)
+            yield {
+                'vendor_id': vendor_id,
+                'name': f'{document_type}-{vendor_id}.pdf',
+                'document_type': document_type,
+                'file_path': f'{rng.getrandbits(128):032x}',
+                'mime_type': 'application/pdf',
+                'size': rng.randrange(20_000, 2_000_000),
+                'expiry_date': (base_date + timedelta(days=rng.randrange(-60, 540))
+                                if rng.random() < 0.8 else None),
+                'created_at': created,
+                'updated_at': updated,
+            }
+
+
+def _insert(db, table, rows, label):
+    from sqlalchemy import insert
+
+    started = time.perf_counter()
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(insert(table), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(table), batch)
+        count += len(batch)
+    db.session.commit()
+    print(f'  {label:<12} {count:>9} rows in {time.perf_counter() - started:6.1f}s', file=sys.stderr)
+    return count
+
+
+def generate(app, vendors=100_000, users=50, seed=42, base_date=None, reset=False):
+    """Fill the app's database; returns the row counts by table."""
+    from sqlalchemy import inspect
+    from werkzeug.security import generate_password_hash
+    from app.extensions import db
+    from app.models import (DashboardCounter, Role, User, Vendor, VendorCategory,
+                            VendorContact, VendorDocument)
+    from app.models.dedup import rebuild_blocking_keys
+
+    rng = random.Random(seed)
+    base_date = base_date or date.today()
+    now = datetime.combine(base_date, datetime.min.time())
+    with app.app_context():
+        if reset:
+            db.drop_all()
+        elif inspect(db.engine).has_table('vendors') and db.session.query(Vendor.id).first():
+            raise SystemExit('The database already has vendors; use --reset to replace them.')
+        db.create_all()
+
+        Role.insert_default_roles()
+        roles = {role.name: role for role in Role.query}
+        password_hash = generate_password_hash('benchmark')
+        for index in range(users):
+            role = 'Admin' if index == 0 else 'Staff' if index % 5 == 0 else 'User'
+            user = User(username=f'bench-{role.lower()}-{index}',
+                        email=f'bench{index}@example.org', password_hash=password_hash,
+                        first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                        created_at=now, updated_at=now)
+            user.roles.append(roles[role])
+            db.session.add(user)
+        db.session.add_all(VendorCategory(name=name, created_at=now, updated_at=now)
+                           for name in CATEGORIES)
+        db.session.commit()
+        category_ids = sorted(id for id, in db.session.query(VendorCategory.id))
+
+        counts = {'users': users, 'categories': len(category_ids)}
+        counts['vendors'] = _insert(db, Vendor.__table__,
+                                    vendor_rows(rng, vendors, category_ids, now), 'vendors')
+        counts['contacts'] = _insert(db, VendorContact.__table__,
+                                     contact_rows(rng, vendors, now), 'contacts')
+        counts['documents'] = _insert(db, VendorDocument.__table__,
+                                      document_rows(rng, vendors, base_date, now), 'documents')
+
+        started = time.perf_counter()
+        DashboardCounter.rebuild()
+        rebuild_blocking_keys()
+        print(f'  derived tables rebuilt in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+        if db.engine.dialect.name == 'sqlite':
+            db.session.execute(db.text('ANALYZE'))
+            db.session.commit()
+
+        from flask_migrate import stamp
+        stamp(directory=str(ROOT / 'migrations'))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default=DEFAULT_DATABASE,
+                        help='SQLAlchemy URL of the database to fill.')
+    parser.add_argument('--vendors', type=int, default=100_000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--base-date', type=date.fromisoformat,
+                        help='Date timestamps and expiry dates are relative to '
+                             '(YYYY-MM-DD, default today).')
+    parser.add_argument('--reset', action='store_true',
+                        help='Drop and recreate every table first.')
+    args = parser.parse_args()
+
+    app = make_app(args.database, 'production', MIGRATE_ENABLED=True)
+    started = time.perf_counter()
+    counts = generate(app, args.vendors, args.users, args.seed, args.base_date, args.reset)
+    print(f"Generated {', '.join(f'{count} {table}' for table, count in counts.items())} "
+          f'in {time.perf_counter() - started:.1f}s into {args.database}')
+
+
+if __name__ == '__main__':
+    main()
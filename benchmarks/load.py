@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""Load harness: concurrent logged-in clients driving the blueprints through the WSGI app.
+
+Each worker thread has its own test client, logged in as one of the users
+generated by ``datagen.py`` (admins, staff and plain users in turn), and
+issues a seeded, weighted mix of listing, filter, search, API,
+autocomplete, document, dashboard and change feed requests.  Latency is
+measured around the full WSGI call; queries per request are read from the
+``Server-Timing`` header of the request instrumentation.  Results are
+written as JSON so they can be compared between commits::
+
+    python benchmarks/load.py --workers 8 --duration 30 --output load-main.json
+    python benchmarks/load.py --compare load-main.json
+
+Workers share one interpreter, so absolute throughput is lower than a
+multi-process server's; compare runs made with the same settings.
+"""
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from common import (DEFAULT_DATABASE, change, environment, load_result, make_app,
+                    save_result, summarize)
+
+_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+SEARCH_TERMS = ('acme', 'summit', 'cater', 'plumbing', 'grace', 'tech', 'oak tree',
+                'heritage llc', 'zzz')
+
+
+class Targets:
+    """Vendor ids, cursors and categories the scenarios pick from."""
+
+    def __init__(self, app, seed):
+        from sqlalchemy import func, select
+        from app.extensions import db
+        from app.models import User, Vendor, VendorCategory, VendorDocument
+        from app.utils.pagination import encode_cursor
+
+        rng = random.Random(seed)
+        with app.app_context():
+            count = db.session.scalar(select(func.count(Vendor.id)))
+            if not count:
+                raise SystemExit('The database has no vendors; run benchmarks/datagen.py first.')
+            self.vendor_count = count
+            self.cursors = [encode_cursor(list(db.session.execute(
+                select(Vendor.name, Vendor.id).order_by(Vendor.name, Vendor.id)
+                .offset(rng.randrange(count)).limit(1)).one())) for _ in range(20)]
+            self.categories = db.session.scalars(select(VendorCategory.id)).all()
+            self.document_vendors = db.session.scalars(
+                select(VendorDocument.vendor_id).distinct()
+                .order_by(VendorDocument.vendor_id).limit(2000)).all()
+            self.users = db.session.scalars(
+                select(User.id).where(User.username.like('bench-%')).order_by(User.id)).all()
+            self.dialect = db.engine.dialect.name
+        if not self.users:
+            raise SystemExit('The database has no bench-* users; run benchmarks/datagen.py first.')
+
+
+# name: (weight, request path for the worker's rng)
+SCENARIOS = {
+    'vendors.index': (20, lambda rng, t: '/vendors/'),
+    'vendors.index_cursor': (15, lambda rng, t: f'/vendors/?cursor={rng.choice(t.cursors)}'),
+    'vendors.index_filter': (10, lambda rng, t: rng.choice((
+        f'/vendors/?category={rng.choice(t.categories)}', '/vendors/?status=inactive'))),
+    'vendors.index_search': (10, lambda rng, t: f'/vendors/?q={rng.choice(SEARCH_TERMS)}'),
+    'vendors.api': (10, lambda rng, t: f'/vendors/api?cursor={rng.choice(t.cursors)}'),
+    'vendors.autocomplete': (20, lambda rng, t: (
+        f'/vendors/autocomplete?q={rng.choice(SEARCH_TERMS)[:rng.randrange(1, 5)]}')),
+    'vendors.documents': (5, lambda rng, t: f'/vendors/{rng.choice(t.document_vendors)}/documents'),
+    'main.dashboard': (5, lambda rng, t: '/dashboard'),
+    'vendors.changes': (5, lambda rng, t: '/vendors/changes/vendors?limit=100'),
+}
+
+
+def worker(app, targets, user_id, seed, deadline, requests, samples):
+    """Issue requests until ``deadline`` or ``requests`` have been made."""
+    rng = random.Random(seed)
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][0] for name in names]
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    made = 0
+    while made < requests and time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        path = SCENARIOS[name][1](rng, targets)
+        started = time.perf_counter()
+        response = client.get(path)
+        response.close()
+        elapsed = time.perf_counter() - started
+        match = _QUERIES.search(response.headers.get('Server-Timing', ''))
+        samples.append((name, elapsed, response.status_code,
+                        int(match.group(1)) if match else None))
+        made += 1
+
+
+def benchmark(app, workers, duration, requests, warmup, seed):
+    targets = Targets(app, seed)
+    # Warm-up requests fill the caches and build the typeahead index.
+    warm = []
+    worker(app, targets, targets.users[0], seed, float('inf'), warmup, warm)
+
+    samples = []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=worker, args=(
+        app, targets, targets.users[index % len(targets.users)], seed + index + 1,
+        deadline, requests, samples)) for index in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    by_scenario = defaultdict(list)
+    for sample in samples:
+        by_scenario[sample[0]].append(sample)
+    scenarios = {name: _stats(by_scenario[name]) for name in SCENARIOS if by_scenario[name]}
+    return dict(environment(dialect=targets.dialect, vendors=targets.vendor_count,
+                            workers=workers, seed=seed),
+                wall=wall, requests=len(samples),
+                throughput=len(samples) / wall if wall else 0.0,
+                overall=_stats(samples), scenarios=scenarios)
+
+
+def _stats(samples):
+    queries = [sample[3] for sample in samples if sample[3] is not None]
+    errors = defaultdict(int)
+    for sample in samples:
+        if sample[2] >= 400:
+            errors[str(sample[2])] += 1
+    return dict(summarize([sample[1] for sample in samples]), requests=len(samples),
+                errors=dict(errors),
+                queries=sum(queries) / len(queries) if queries else None,
+                max_queries=max(queries, default=None))
+
+
+def report(result, baseline=None):
+    print(f"{result['requests']} requests from {result['workers']} worker(s) in "
+          f"{result['wall']:.1f}s: {result['throughput']:.1f} req/s"
+          f"{change(result['throughput'], (baseline or {}).get('throughput'))}; "
+          f"{result['vendors']} vendors on {result['dialect']}")
+    print(f"  {'scenario':<24} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+          f" {'queries':>8} {'errors':>7}")
+    rows = [*result['scenarios'].items(), ('overall', result['overall'])]
+    for name, stats in rows:
+        base = ((baseline or {}).get('overall') if name == 'overall'
+                else (baseline or {}).get('scenarios', {}).get(name)) or {}
+        queries = f"{stats['queries']:8.1f}" if stats['queries'] is not None else f"{'-':>8}"
+        print(f"  {name:<24} {stats['requests']:8d} {stats['p50'] * 1000:9.1f} "
+              f"{stats['p95'] * 1000:9.1f} {stats['p99'] * 1000:9.1f} {queries} "
+              f"{sum(stats['errors'].values()):7d}{change(stats['p95'], base.get('p95'))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default=DEFAULT_DATABASE,
+                        help='SQLAlchemy URL of a database filled by datagen.py.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20,
+                        help='Seconds to run for.')
+    parser.add_argument('--requests', type=int, default=sys.maxsize,
+                        help='Stop each worker after this many requests.')
+    parser.add_argument('--warmup', type=int, default=50,
+                        help='Requests made before measuring.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='Show p95 changes from an earlier result file.')
+    args = parser.parse_args()
+
+    # The test client talks plain HTTP, so the session cookie must not be Secure.
+    app = make_app(args.database, 'production', SESSION_COOKIE_SECURE=False,
+                   INSTRUMENTATION_ENABLED=True, SLOW_REQUEST_THRESHOLD_MS=60_000,
+                   SLOW_QUERY_THRESHOLD_MS=60_000)
+    result = benchmark(app, args.workers, args.duration, args.requests, args.warmup, args.seed)
+    report(result, load_result(args.compare) if args.compare else None)
+    if args.output:
+        save_result(result, args.output)
+
+
+if __name__ == '__main__':
+    main()
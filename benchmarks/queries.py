@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+"""Query microbenchmarks: latency and SQL statements per call of the model queries.
+
+Runs each case against a database filled by ``datagen.py`` and reports
+p50/p95/p99 latency and the number of statements it executed.  Every
+iteration starts with an empty session, so identity-map hits do not hide
+queries.  Results are written as JSON so they can be compared between
+commits::
+
+    python benchmarks/queries.py --output queries-main.json
+    python benchmarks/queries.py --compare queries-main.json --case search
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from common import (DEFAULT_DATABASE, change, environment, load_result, make_app,
+                    save_result, summarize)
+
+
+class Fixture:
+    """Inputs shared by the cases, drawn from the database with a fixed seed."""
+
+    def __init__(self, app, seed):
+        from sqlalchemy import func, select
+        from app.extensions import db
+        from app.models import User, Vendor, VendorCategory
+        from app.utils.pagination import encode_cursor
+
+        self.app = app
+        rng = random.Random(seed)
+        self.vendor_count = db.session.scalar(select(func.count(Vendor.id)))
+        if not self.vendor_count:
+            raise SystemExit('The database has no vendors; run benchmarks/datagen.py first.')
+        max_id = db.session.scalar(select(func.max(Vendor.id)))
+        self.vendor_ids = [rng.randrange(1, max_id + 1) for _ in range(1000)]
+        # A cursor 90% of the way through the (name, id) ordering.
+        name, id = db.session.execute(
+            select(Vendor.name, Vendor.id).order_by(Vendor.name, Vendor.id)
+            .offset(self.vendor_count * 9 // 10).limit(1)).one()
+        self.deep_cursor = encode_cursor([name, id])
+        self.category_id = db.session.scalar(
+            select(VendorCategory.id).order_by(VendorCategory.id))
+        vendor = db.session.get(Vendor, self.vendor_ids[0])
+        # Common: the first word of a name; rare: the whole name.
+        self.common_term = vendor.name.split()[0]
+        self.rare_term = vendor.name
+        self.duplicate_fields = {
+            'name': vendor.name + ' Inc', 'legal_name': vendor.legal_name,
+            'tax_id': None, 'address_line1': vendor.address_line1,
+            'postal_code': vendor.postal_code}
+        self.prefixes = [vendor.name[:length] for vendor in
+                         db.session.scalars(select(Vendor).where(Vendor.id.in_(self.vendor_ids[:50])))
+                         for length in (1, 3, 6)]
+        self.staff_id = db.session.scalar(
+            select(User.id).where(User.username.like('bench-staff-%')).order_by(User.id))
+        db.session.rollback()
+
+
+def _listing(criteria=()):
+    from sqlalchemy.orm import selectinload
+    from app.models import Vendor
+
+    return (Vendor.query.options(selectinload(Vendor.primary_contact))
+            .filter(*criteria))
+
+
+def keyset_first_page(fixture):
+    from app.models import Vendor
+    from app.utils.pagination import keyset_paginate
+    return lambda i: keyset_paginate(_listing(), (Vendor.name, Vendor.id), per_page=20)
+
+
+def keyset_deep_page(fixture):
+    from app.models import Vendor
+    from app.utils.pagination import keyset_paginate
+    return lambda i: keyset_paginate(_listing(), (Vendor.name, Vendor.id),
+                                     cursor=fixture.deep_cursor, per_page=20)
+
+
+def keyset_status_filter(fixture):
+    from app.models import Vendor
+    from app.utils.pagination import keyset_paginate
+    return lambda i: keyset_paginate(_listing([Vendor.status == 'inactive']),
+                                     (Vendor.name, Vendor.id), per_page=20)
+
+
+def keyset_category_filter(fixture):
+    from app.models import Vendor
+    from app.utils.pagination import keyset_paginate
+    return lambda i: keyset_paginate(_listing([Vendor.category_id == fixture.category_id]),
+                                     (Vendor.name, Vendor.id), per_page=20)
+
+
+def search_common(fixture):
+    from app.models import Vendor
+    return lambda i: Vendor.search(fixture.common_term).limit(20).all()
+
+
+def search_rare(fixture):
+    from app.models import Vendor
+    return lambda i: Vendor.search(fixture.rare_term).limit(20).all()
+
+
+def search_count(fixture):
+    from sqlalchemy import func, select
+    from app.extensions import db
+    from app.models import Vendor
+    return lambda i: db.session.scalar(
+        select(func.count()).select_from(Vendor.search_ids(fixture.common_term).subquery()))
+
+
+def get_by_id(fixture):
+    from app.models import Vendor
+    ids = fixture.vendor_ids
+    return lambda i: Vendor.get_by_id(ids[i % len(ids)])
+
+
+def expiring_documents(fixture):
+    from sqlalchemy.orm import joinedload
+    from app.models import VendorDocument
+
+    today = date.today()
+    horizon = today + timedelta(days=fixture.app.config['DOCUMENT_EXPIRY_DAYS'])
+    return lambda i: (VendorDocument.query
+                      .options(joinedload(VendorDocument.vendor))
+                      .filter(VendorDocument.expiry_date.between(today, horizon))
+                      .order_by(VendorDocument.expiry_date, VendorDocument.id)
+                      .limit(5).all())
+
+
+def dashboard_counters(fixture):
+    from app.models import DashboardCounter
+
+    today = date.today()
+    horizon = today + timedelta(days=fixture.app.config['DOCUMENT_EXPIRY_DAYS'])
+
+    def run(i):
+        DashboardCounter.total('vendors')
+        DashboardCounter.values('vendors.category')
+        DashboardCounter.values('vendors.status')
+        DashboardCounter.total('documents.expiry', today.isoformat(), horizon.isoformat())
+    return run
+
+
+def request_context(fixture):
+    """Baseline for ``permission_required``: the same request without the check."""
+    from flask_login import login_user
+    from app.utils.identity import identity_cache
+
+    def run(i):
+        with fixture.app.test_request_context('/vendors/'):
+            login_user(identity_cache.load(fixture.staff_id))
+    return run
+
+
+def permission_required(fixture):
+    from flask_login import login_user
+    from app.models import Permission
+    from app.utils.decorators import permission_required
+    from app.utils.identity import identity_cache
+
+    view = permission_required(Permission.VIEW)(lambda: None)
+
+    def run(i):
+        with fixture.app.test_request_context('/vendors/'):
+            login_user(identity_cache.load(fixture.staff_id))
+            view()
+    return run
+
+
+def reference_categories(fixture):
+    from app.models import VendorCategory
+    from app.utils.reference import reference_cache
+    return lambda i: reference_cache.all(VendorCategory)
+
+
+def typeahead_search(fixture):
+    from app.utils.typeahead import vendor_typeahead
+
+    if not vendor_typeahead.built:
+        vendor_typeahead.build()
+    prefixes = fixture.prefixes
+    return lambda i: vendor_typeahead.search(prefixes[i % len(prefixes)])
+
+
+def possible_duplicates(fixture):
+    from app.utils.dedup import possible_duplicates
+    return lambda i: possible_duplicates(fixture.duplicate_fields)
+
+
+def change_feed(fixture):
+    from app.utils.change_feed import read_changes
+    return lambda i: read_changes('vendors', None, 500, lag_seconds=0)
+
+
+CASES = {
+    'vendors.keyset_first_page': keyset_first_page,
+    'vendors.keyset_deep_page': keyset_deep_page,
+    'vendors.keyset_status_filter': keyset_status_filter,
+    'vendors.keyset_category_filter': keyset_category_filter,
+    'vendors.search_common': search_common,
+    'vendors.search_rare': search_rare,
+    'vendors.search_count': search_count,
+    'vendors.get_by_id': get_by_id,
+    'documents.expiring': expiring_documents,
+    'dashboard.counters': dashboard_counters,
+    'rbac.request_context': request_context,
+    'rbac.permission_required': permission_required,
+    'reference.categories': reference_categories,
+    'typeahead.search': typeahead_search,
+    'dedup.possible_duplicates': possible_duplicates,
+    'changes.read_vendors': change_feed,
+}
+
+
+def run_case(factory, fixture, iterations, warmup):
+    """Per-call seconds and the statements executed by the last call."""
+    from sqlalchemy import event
+    from app.extensions import db
+
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    call = factory(fixture)
+    timings = []
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        for i in range(warmup + iterations):
+            db.session.expunge_all()
+            statements[0] = 0
+            started = time.perf_counter()
+            call(i)
+            elapsed = time.perf_counter() - started
+            db.session.rollback()
+            if i >= warmup:
+                timings.append(elapsed)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return timings, statements[0]
+
+
+def benchmark(app, iterations, warmup, seed, selected):
+    from app.extensions import db
+
+    with app.app_context():
+        fixture = Fixture(app, seed)
+        cases = {}
+        for name, factory in CASES.items():
+            if selected and not any(part in name for part in selected):
+                continue
+            timings, statements = run_case(factory, fixture, iterations, warmup)
+            cases[name] = dict(summarize(timings), queries=statements)
+            print(f'  {name:<32} done', file=sys.stderr)
+        dialect = db.engine.dialect.name
+    return dict(environment(dialect=dialect, vendors=fixture.vendor_count,
+                            iterations=iterations, seed=seed), cases=cases)
+
+
+def report(result, baseline=None):
+    print(f"{result['vendors']} vendors on {result['dialect']}, "
+          f"{result['iterations']} iterations per case")
+    print(f"  {'case':<32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+    for name, case in result['cases'].items():
+        base = (baseline or {}).get('cases', {}).get(name, {})
+        print(f"  {name:<32} {case['p50'] * 1000:9.3f} {case['p95'] * 1000:9.3f} "
+              f"{case['p99'] * 1000:9.3f} {case['queries']:8d}"
+              f"{change(case['p50'], base.get('p50'))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default=DEFAULT_DATABASE,
+                        help='SQLAlchemy URL of a database filled by datagen.py.')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--case', action='append', default=[],
+                        help='Only run cases whose name contains this (repeatable).')
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='Show p50 changes from an earlier result file.')
+    args = parser.parse_args()
+
+    app = make_app(args.database, 'production', SCHEDULER_ENABLED=False)
+    result = benchmark(app, args.iterations, args.warmup, args.seed, args.case)
+    report(result, load_result(args.compare) if args.compare else None)
+    if args.output:
+        save_result(result, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""Startup-time benchmark: import cost per package and create_app cost per component.
+
+Each run starts a fresh interpreter with ``-X importtime``, imports the app
+package and calls ``create_app``; the medians over all runs are reported.
+Results are written as JSON so they can be kept per release and compared::
+
+    python benchmarks/startup.py --runs 10 --output startup-1.2.json
+    python benchmarks/startup.py --compare startup-1.2.json
+
+``--cli`` measures a ``flask`` CLI process (which also loads Flask-Migrate)
+instead of a WSGI worker.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = '''
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({config!r})
+done = time.perf_counter()
+print(json.dumps({{'import': imported - started, 'create_app': done - imported,
+                  'components': app.extensions['startup']}}))
+'''
+
+
+def parse_importtime(stderr):
+    """Sum self import time (seconds) per top-level package."""
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us) / 1e6
+    return packages
+
+
+def run_once(config_name, cli):
+    env = dict(os.environ)
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    if cli:
+        env['FLASK_RUN_FROM_CLI'] = 'true'
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD.format(config=config_name)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample['process'] = wall
+    sample['packages'] = parse_importtime(result.stderr)
+    return sample
+
+
+def median_of(samples, key):
+    names = set().union(*(sample[key] for sample in samples))
+    return {name: statistics.median(sample[key].get(name, 0.0) for sample in samples)
+            for name in sorted(names)}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(runs, config_name, cli):
+    samples = [run_once(config_name, cli) for _ in range(runs)]
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'config': config_name,
+        'mode': 'cli' if cli else 'worker',
+        'runs': runs,
+        'process': statistics.median(s['process'] for s in samples),
+        'import': statistics.median(s['import'] for s in samples),
+        'create_app': statistics.median(s['create_app'] for s in samples),
+        'components': median_of(samples, 'components'),
+        'packages': median_of(samples, 'packages'),
+    }
+
+
+def report(result, baseline=None, top=15):
+    def row(label, value, base_value=None):
+        line = f'  {label:<32} {value * 1000:9.1f} ms'
+        if base_value is not None:
+            line += f'  {(value - base_value) * 1000:+9.1f} ms'
+        return line
+
+    def base(section, name=None):
+        if baseline is None:
+            return None
+        return baseline[section] if name is None else baseline[section].get(name, 0.0)
+
+    print(f"{result['mode']} startup, {result['config']} config, "
+          f"median of {result['runs']} run(s)")
+    for name in ('process', 'import', 'create_app'):
+        print(row(name, result[name], base(name)))
+    print('create_app components:')
+    for name, value in result['components'].items():
+        if name != 'create_app':
+            print(row(name, value, base('components', name)))
+    print(f'slowest packages to import (self time, top {top}):')
+    slowest = sorted(result['packages'].items(), key=lambda item: -item[1])[:top]
+    for name, value in slowest:
+        print(row(name, value, base('packages', name)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--config', default='production',
+                        help='Config name passed to create_app.')
+    parser.add_argument('--cli', action='store_true',
+                        help='Measure a flask CLI process instead of a worker.')
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='Show differences from an earlier result file.')
+    args = parser.parse_args()
+
+    result = benchmark(args.runs, args.config, args.cli)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Dashboard counters
+
+Revision ID: 0a7d5c3e9b21
+Revises: f3b6a2d8c917
+Create Date: 2025-11-25 10:14:52.803117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7d5c3e9b21'
+down_revision = 'f3b6a2d8c917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dashboard_counters',
+    sa.Column('metric', sa.String(length=40), nullable=False),
+    sa.Column('bucket', sa.String(length=40), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('metric', 'bucket', name='uq_dashboard_counters_metric_bucket')
+    )
+
+    # Backfill from the current vendors and documents.
+    op.execute(
+        "INSERT INTO dashboard_counters (metric, bucket, value, created_at, updated_at) "
+        "SELECT 'vendors', '', count(*), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM vendors")
+    op.execute(
+        "INSERT INTO dashboard_counters (metric, bucket, value, created_at, updated_at) "
+        "SELECT 'vendors.status', coalesce(status, ''), count(*), CURRENT_TIMESTAMP, "
+        "CURRENT_TIMESTAMP FROM vendors GROUP BY coalesce(status, '')")
+    op.execute(
+        "INSERT INTO dashboard_counters (metric, bucket, value, created_at, updated_at) "
+        "SELECT 'vendors.category', coalesce(CAST(category_id AS VARCHAR), ''), count(*), "
+        "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM vendors "
+        "GROUP BY coalesce(CAST(category_id AS VARCHAR), '')")
+    op.execute(
+        "INSERT INTO dashboard_counters (metric, bucket, value, created_at, updated_at) "
+        "SELECT 'documents.expiry', CAST(expiry_date AS VARCHAR), count(*), "
+        "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM vendor_documents "
+        "WHERE expiry_date IS NOT NULL GROUP BY CAST(expiry_date AS VARCHAR)")
+
+
+def downgrade():
+    op.drop_table('dashboard_counters')
@@ -0,0 +1,48 @@
+"""Vendor blocking keys for duplicate detection
+
+Revision ID: 1c84e6f2a0d7
+Revises: 0a7d5c3e9b21
+Create Date: 2025-11-26 09:41:27.116508
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c84e6f2a0d7'
+down_revision = '0a7d5c3e9b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    blocking_keys_table = op.create_table('vendor_blocking_keys',
+    sa.Column('key', sa.String(length=80), nullable=False),
+    sa.Column('vendor_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key', 'vendor_id')
+    )
+    with op.batch_alter_table('vendor_blocking_keys', schema=None) as batch_op:
+        batch_op.create_index('ix_vendor_blocking_keys_vendor_id', ['vendor_id'], unique=False)
+
+    # Backfill with the application's key function; after changing it, run
+    # `flask vendors duplicates --rebuild-index` instead.
+    from app.models.dedup import blocking_keys
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT id, name, legal_name, tax_id, address_line1, postal_code FROM vendors'))
+    batch = []
+    for row in rows:
+        batch.extend({'key': key, 'vendor_id': row[0]} for key in blocking_keys(*row[1:]))
+        if len(batch) >= 5000:
+            op.bulk_insert(blocking_keys_table, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(blocking_keys_table, batch)
+
+
+def downgrade():
+    with op.batch_alter_table('vendor_blocking_keys', schema=None) as batch_op:
+        batch_op.drop_index('ix_vendor_blocking_keys_vendor_id')
+
+    op.drop_table('vendor_blocking_keys')
@@ -0,0 +1,76 @@
+"""Vendor full-text search index
+
+Revision ID: 3f9c1d7e2b45
+Revises: aa63ae2b4ddc
+Create Date: 2025-11-10 09:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1d7e2b45'
+down_revision = 'aa63ae2b4ddc'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE vendors_fts USING fts5("
+    "name, legal_name, tax_id, content='vendors', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER vendors_fts_ai AFTER INSERT ON vendors BEGIN "
+    "INSERT INTO vendors_fts(rowid, name, legal_name, tax_id) "
+    "VALUES (new.id, new.name, new.legal_name, new.tax_id); END",
+    "CREATE TRIGGER vendors_fts_ad AFTER DELETE ON vendors BEGIN "
+    "INSERT INTO vendors_fts(vendors_fts, rowid, name, legal_name, tax_id) "
+    "VALUES ('delete', old.id, old.name, old.legal_name, old.tax_id); END",
+    "CREATE TRIGGER vendors_fts_au "
+    "AFTER UPDATE OF name, legal_name, tax_id ON vendors BEGIN "
+    "INSERT INTO vendors_fts(vendors_fts, rowid, name, legal_name, tax_id) "
+    "VALUES ('delete', old.id, old.name, old.legal_name, old.tax_id); "
+    "INSERT INTO vendors_fts(rowid, name, legal_name, tax_id) "
+    "VALUES (new.id, new.name, new.legal_name, new.tax_id); END",
+    # Backfill the index from the existing rows.
+    "INSERT INTO vendors_fts(vendors_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS vendors_fts_au",
+    "DROP TRIGGER IF EXISTS vendors_fts_ad",
+    "DROP TRIGGER IF EXISTS vendors_fts_ai",
+    "DROP TABLE IF EXISTS vendors_fts",
+)
+
+# The index is built from the existing rows as part of CREATE INDEX.
+POSTGRESQL_UPGRADE = (
+    "CREATE INDEX ix_vendors_search ON vendors USING gin ("
+    "to_tsvector('simple', coalesce(name, '') || ' ' || "
+    "coalesce(legal_name, '') || ' ' || coalesce(tax_id, '')))",
+)
+
+POSTGRESQL_DOWNGRADE = (
+    "DROP INDEX IF EXISTS ix_vendors_search",
+)
+
+
+def _run(statements):
+    for statement in statements:
+        op.execute(sa.text(statement))
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _run(SQLITE_UPGRADE)
+    elif dialect == 'postgresql':
+        _run(POSTGRESQL_UPGRADE)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _run(SQLITE_DOWNGRADE)
+    elif dialect == 'postgresql':
+        _run(POSTGRESQL_DOWNGRADE)
@@ -0,0 +1,51 @@
+"""Change feed indexes and tombstones
+
+Revision ID: 5d1e9a7c3b60
+Revises: 1c84e6f2a0d7
+Create Date: 2025-11-27 14:08:33.290415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1e9a7c3b60'
+down_revision = '1c84e6f2a0d7'
+branch_labels = None
+depends_on = None
+
+FEED_TABLES = ('vendors', 'vendor_contacts', 'vendor_documents')
+
+
+def upgrade():
+    op.create_table('tombstones',
+    sa.Column('entity', sa.String(length=40), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_tombstones_entity_updated_at_entity_id',
+                              ['entity', 'updated_at', 'entity_id'], unique=False)
+
+    for table in FEED_TABLES:
+        # Rows without updated_at would never appear in the feed.
+        op.execute(f'UPDATE {table} SET updated_at = coalesce(created_at, CURRENT_TIMESTAMP) '
+                   'WHERE updated_at IS NULL')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(f'ix_{table}_updated_at_id', ['updated_at', 'id'],
+                                  unique=False)
+
+
+def downgrade():
+    for table in FEED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_updated_at_id')
+
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_tombstones_entity_updated_at_entity_id')
+
+    op.drop_table('tombstones')
@@ -0,0 +1,26 @@
+"""Composite index for keyset pagination of the vendor listing
+
+Revision ID: 7b2e4a91c0d3
+Revises: 3f9c1d7e2b45
+Create Date: 2025-11-12 14:40:07.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e4a91c0d3'
+down_revision = '3f9c1d7e2b45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('vendors', schema=None) as batch_op:
+        batch_op.create_index('ix_vendors_name_id', ['name', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('vendors', schema=None) as batch_op:
+        batch_op.drop_index('ix_vendors_name_id')
@@ -0,0 +1,32 @@
+"""Tombstone prune watermarks
+
+Revision ID: 8e3b1f6a2c94
+Revises: 5d1e9a7c3b60
+Create Date: 2025-12-01 10:22:17.504918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3b1f6a2c94'
+down_revision = '5d1e9a7c3b60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tombstone_watermarks',
+    sa.Column('entity', sa.String(length=40), nullable=False),
+    sa.Column('pruned_through', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entity')
+    )
+
+
+def downgrade():
+    op.drop_table('tombstone_watermarks')
@@ -0,0 +1,48 @@
+"""Cached effective permissions on users
+
+Revision ID: c41d8e07a6b2
+Revises: 7b2e4a91c0d3
+Create Date: 2025-11-14 10:03:52.774190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d8e07a6b2'
+down_revision = '7b2e4a91c0d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('permission_mask', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('role_names', sa.String(length=512), nullable=False, server_default=''))
+        batch_op.add_column(sa.Column('authz_version', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the current role assignments.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT user_roles.user_id, roles.name, roles.permissions '
+        'FROM user_roles JOIN roles ON roles.id = user_roles.role_id'
+    ))
+    effective = {}
+    for user_id, name, permissions in rows:
+        mask, names = effective.setdefault(user_id, [0, []])
+        effective[user_id][0] = mask | (permissions or 0)
+        names.append(name)
+    users = sa.table('users', sa.column('id'), sa.column('permission_mask'),
+                     sa.column('role_names'), sa.column('authz_version'))
+    for user_id, (mask, names) in effective.items():
+        bind.execute(users.update().where(users.c.id == user_id).values(
+            permission_mask=mask, role_names=','.join(sorted(names)),
+            authz_version=1))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('authz_version')
+        batch_op.drop_column('role_names')
+        batch_op.drop_column('permission_mask')
@@ -0,0 +1,42 @@
+"""Indexes for the vendor listing, contacts and documents
+
+Revision ID: d92f6b3a1e58
+Revises: c41d8e07a6b2
+Create Date: 2025-11-17 11:26:45.930281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd92f6b3a1e58'
+down_revision = 'c41d8e07a6b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('vendors', schema=None) as batch_op:
+        batch_op.create_index('ix_vendors_status_name_id', ['status', 'name', 'id'], unique=False)
+        batch_op.create_index('ix_vendors_category_id_name_id', ['category_id', 'name', 'id'], unique=False)
+
+    with op.batch_alter_table('vendor_contacts', schema=None) as batch_op:
+        batch_op.create_index('ix_vendor_contacts_vendor_id_is_primary', ['vendor_id', 'is_primary'], unique=False)
+
+    with op.batch_alter_table('vendor_documents', schema=None) as batch_op:
+        batch_op.create_index('ix_vendor_documents_vendor_id', ['vendor_id'], unique=False)
+        batch_op.create_index('ix_vendor_documents_expiry_date_id', ['expiry_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('vendor_documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_vendor_documents_expiry_date_id')
+        batch_op.drop_index('ix_vendor_documents_vendor_id')
+
+    with op.batch_alter_table('vendor_contacts', schema=None) as batch_op:
+        batch_op.drop_index('ix_vendor_contacts_vendor_id_is_primary')
+
+    with op.batch_alter_table('vendors', schema=None) as batch_op:
+        batch_op.drop_index('ix_vendors_category_id_name_id')
+        batch_op.drop_index('ix_vendors_status_name_id')
@@ -0,0 +1,34 @@
+"""Document expiry notices
+
+Revision ID: e5a07c93d1f4
+Revises: d92f6b3a1e58
+Create Date: 2025-11-21 16:48:12.560934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a07c93d1f4'
+down_revision = 'd92f6b3a1e58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('vendor_document_notices',
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('expiry_date', sa.Date(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['vendor_documents.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('document_id', 'expiry_date', name='uq_vendor_document_notices_document_id_expiry_date')
+    )
+
+
+def downgrade():
+    op.drop_table('vendor_document_notices')
@@ -0,0 +1,59 @@
+"""Shared fixtures: a testing app on an in-memory database."""
+from datetime import date, timedelta
+import pytest
+from app import create_app
+from app.extensions import db as _db
+from app.models import (Role, User, Vendor, VendorCategory, VendorContact,
+                        VendorDocument)
+from app.utils.pagination import _count_cache
+from app.utils.reference import reference_cache
+from app.utils.typeahead import vendor_typeahead
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        _db.create_all()
+        Role.insert_default_roles()
+        # Process-wide caches outlive the app; start each test empty.
+        reference_cache.invalidate()
+        _count_cache.clear()
+        vendor_typeahead.__init__()
+        vendor_typeahead.init_app(app)
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def admin(db):
+    """Id of a user with the Admin role."""
+    user = User(username='admin', email='admin@example.com', password_hash='x')
+    user.roles.append(Role.query.filter_by(name='Admin').one())
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+@pytest.fixture
+def vendors(db):
+    """A few vendors with a category, contacts and documents."""
+    category = VendorCategory(name='Supplies')
+    rows = []
+    for index, name in enumerate(('Acme Supply', 'Summit Catering', 'Oak Tree Tech')):
+        vendor = Vendor(name=name, legal_name=f'{name} LLC', tax_id=f'12-345678{index}',
+                        status='active' if index else 'inactive', category=category)
+        vendor.contacts.append(VendorContact(name=f'Contact {index}', is_primary=True))
+        vendor.documents.append(VendorDocument(
+            name=f'w9-{index}.pdf', document_type='w9', file_path=f'w9-{index}.pdf',
+            expiry_date=date.today() + timedelta(days=10 * (index + 1))))
+        rows.append(vendor)
+    db.session.add_all(rows)
+    db.session.commit()
+    return [vendor.id for vendor in rows]
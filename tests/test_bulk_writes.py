@@ -0,0 +1,75 @@
+from datetime import datetime
+import pytest
+from app.models import Vendor, VendorCategory, VendorContact, VendorDocument
+
+
+@pytest.fixture(params=['sqlite', 'generic'])
+def dialect(request, db, monkeypatch):
+    """Run on SQLite's ON CONFLICT path and on the update-then-insert fallback."""
+    if request.param == 'generic':
+        monkeypatch.setattr(db.engine.dialect, 'name', 'generic')
+    return request.param
+
+
+def _categories(db):
+    db.session.expire_all()
+    return {category.name: category for category in VendorCategory.query}
+
+
+def test_bulk_insert_stamps_rows(db):
+    before = datetime.utcnow()
+    assert VendorCategory.bulk_insert([{'name': 'Supplies'}, {'name': 'Catering'}]) == 2
+
+    categories = _categories(db)
+    assert sorted(categories) == ['Catering', 'Supplies']
+    for category in categories.values():
+        assert category.created_at >= before
+        assert category.updated_at == category.created_at
+
+
+def test_bulk_upsert_inserts_and_updates(db, dialect):
+    VendorCategory.bulk_insert([{'name': 'Supplies', 'description': 'old',
+                                 'created_at': datetime(2020, 1, 1),
+                                 'updated_at': datetime(2020, 1, 1)}])
+    before = datetime.utcnow()
+
+    count = VendorCategory.bulk_upsert(
+        [{'name': 'Supplies', 'description': 'new'},
+         {'name': 'Catering', 'description': 'added'}], index_elements=['name'])
+
+    assert count == 2
+    categories = _categories(db)
+    supplies, catering = categories['Supplies'], categories['Catering']
+    assert supplies.description == 'new'
+    assert supplies.created_at == datetime(2020, 1, 1)
+    assert supplies.updated_at >= before
+    assert catering.description == 'added'
+    assert catering.created_at >= before
+    assert catering.updated_at == catering.created_at
+
+
+def test_bulk_upsert_updates_only_update_columns(db, dialect):
+    VendorCategory.bulk_insert([{'name': 'Supplies', 'description': 'old'}])
+    stamped = _categories(db)['Supplies'].updated_at
+
+    VendorCategory.bulk_upsert([{'name': 'Supplies', 'description': 'new'}],
+                               index_elements=['name'], update_columns=[])
+
+    supplies = _categories(db)['Supplies']
+    assert supplies.description == 'old'
+    assert supplies.updated_at >= stamped
+
+
+def test_bulk_upsert_rolls_back_on_error(db, dialect):
+    with pytest.raises(Exception):
+        VendorCategory.bulk_upsert([{'name': 'Supplies'}, {'name': None}],
+                                   index_elements=['name'], batch_size=1)
+    assert _categories(db) == {}
+
+
+@pytest.mark.parametrize('model', [Vendor, VendorContact, VendorDocument])
+def test_bulk_writes_refused_for_hooked_models(db, model):
+    with pytest.raises(TypeError):
+        model.bulk_insert([{'name': 'x'}])
+    with pytest.raises(TypeError):
+        model.bulk_upsert([{'name': 'x'}], index_elements=['id'])
@@ -0,0 +1,78 @@
+import socket
+from datetime import datetime, timedelta
+import pytest
+from app.jobs.mail import drain_outbox, enqueue_mail
+from app.models import OutboxMessage
+
+controller = pytest.importorskip('aiosmtpd.controller')
+
+
+class Handler:
+    """Accepts mail except for recipients at ``reject.example``."""
+
+    def __init__(self):
+        self.sessions = set()
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith('@reject.example'):
+            return '550 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.delivered.extend(envelope.rcpt_tos)
+        return '250 Message accepted'
+
+
+@pytest.fixture
+def smtp(app):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    handler = Handler()
+    server = controller.Controller(handler, hostname='127.0.0.1', port=port)
+    server.start()
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=port, MAIL_USE_TLS=False,
+                      MAIL_USERNAME=None, MAIL_TIMEOUT=5, MAIL_WORKERS=1,
+                      MAIL_DEFAULT_SENDER='noreply@example.com',
+                      MAIL_MAX_ATTEMPTS=2, MAIL_RETRY_BASE_SECONDS=60)
+    yield handler
+    server.stop()
+
+
+def test_drain_sends_on_one_pooled_connection(db, smtp):
+    for index in range(5):
+        enqueue_mail(f'user{index}@example.com', f'Message {index}', 'Body')
+    db.session.commit()
+
+    assert drain_outbox(batch_size=2) == (5, 0)
+    assert sorted(smtp.delivered) == [f'user{index}@example.com' for index in range(5)]
+    assert len(smtp.sessions) == 1
+    statuses = db.session.scalars(db.select(OutboxMessage.status)).all()
+    assert statuses == [OutboxMessage.SENT] * 5
+
+
+def test_rejected_messages_back_off_then_dead_letter(db, smtp):
+    message = enqueue_mail('nobody@reject.example', 'Rejected', 'Body')
+    enqueue_mail('user@example.com', 'Accepted', 'Body')
+    db.session.commit()
+
+    started = datetime.utcnow()
+    assert drain_outbox() == (1, 1)
+    db.session.refresh(message)
+    assert message.status == OutboxMessage.PENDING
+    assert message.attempts == 1
+    assert '550' in message.last_error
+    assert message.next_attempt_at >= started + timedelta(seconds=60)
+    # Not due yet, so a second drain leaves it alone.
+    assert drain_outbox() == (0, 0)
+
+    message.next_attempt_at = datetime.utcnow()
+    db.session.commit()
+    assert drain_outbox() == (0, 1)
+    db.session.refresh(message)
+    assert message.status == OutboxMessage.DEAD
+    assert message.attempts == 2
+    assert smtp.delivered == ['user@example.com']
@@ -0,0 +1,14 @@
+from app.utils.query_plan import DEFAULT_PROBES, assert_no_full_scans, default_urls
+
+
+def test_blueprint_get_routes_do_not_scan(app, admin, vendors):
+    urls = default_urls(app, {'id': vendors[0]}) + list(DEFAULT_PROBES)
+    assert_no_full_scans(app, urls, user_id=admin,
+                         allowed_tables=app.config['QUERY_PLAN_ALLOWED_SCANS'])
+
+    # A route that fails before querying would pass the plan check unnoticed.
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin)
+        session['_fresh'] = True
+    assert [url for url in urls if client.get(url).status_code >= 400] == []